@@ -2,22 +2,31 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext, colorchooser
 import os
 import threading
+import multiprocessing
 import sys
 import webbrowser
 import time
-import srt
+import importlib
 import subprocess
 import shutil
-import requests
 from pathlib import Path
 
 # Import from existing translation module
-from gemini_srt_translate import translate_text, translate_srt
-from faster_whisper_extract_srt import extract_subtitles_with_whisper
-import google.generativeai as genai
+from gemini_srt_translate import translate_subtitles, open_translation_cache, configure_gemini, DEFAULT_CONCURRENCY
+from faster_whisper_extract_srt import extract_subtitles_with_whisper, evict_whisper_models, WHISPER_PROFILES, DEFAULT_PROFILE
+from batch_extract import run_batch
+from batch_merge import match_pairs, run_merge_batch, DEFAULT_MERGE_WORKERS, DEFAULT_MERGE_RETRIES
+from log_view import QueuedTextLog
+from ffmpeg_merge import build_ffmpeg_command, ffmpeg_available, run_ffmpeg, format_progress, format_merge_stats, record_merge_stats, estimate_merge_seconds, format_duration, encoder_summary, probe_source_streams, ENCODER_SPEED_PRESETS, X264_TUNES
+from rate_limiter import MODEL_RATE_LIMITS, DEFAULT_RATE_LIMIT, configure_rate_limit
+from batch_planner import batch_token_budget
+
+# Heavy modules imported on first use; warmed in the background once the window is up
+WARM_UP_MODULES = ["srt", "google.generativeai", "faster_whisper"]
+WARM_UP_DELAY_MS = 1000
 
 class SRTTranslatorGUI:
-    def __init__(self, root):
+    def __init__(self, root, warm_up=True):
         self.root = root
         self.root.title("Subtitle Translator & Subtitle Extractor")
         self.root.geometry("1000x1100")
@@ -41,6 +50,13 @@ class SRTTranslatorGUI:
         self.proxy_enabled = tk.BooleanVar(value=True)
         self.proxy_url = tk.StringVar(value="http://127.0.0.1:7890")
         self.model_name = tk.StringVar(value="gemini-2.5-flash")
+        self.translate_concurrency = tk.StringVar(value=str(DEFAULT_CONCURRENCY))
+        default_rpm, default_tpm = MODEL_RATE_LIMITS.get(self.model_name.get(), DEFAULT_RATE_LIMIT)
+        self.rate_limit_rpm = tk.StringVar(value=str(default_rpm))
+        self.rate_limit_tpm = tk.StringVar(value=str(default_tpm))
+        self.use_translation_cache = tk.BooleanVar(value=True)
+        self.resume_translation = tk.BooleanVar(value=True)
+        self.batch_token_budget = tk.StringVar(value=str(batch_token_budget(self.model_name.get())))
         
         # Whisper Variables
         self.video_file = tk.StringVar()
@@ -48,11 +64,25 @@ class SRTTranslatorGUI:
         self.local_model_path = tk.StringVar(value="")
         self.whisper_device = tk.StringVar(value="auto")
         self.selected_model = tk.StringVar(value="Select a model...")
+        self.whisper_profile = tk.StringVar(value=DEFAULT_PROFILE)
+        self.whisper_workers = tk.StringVar(value="1")
+        self.whisper_threads_per_worker = tk.StringVar(value="0")
+        self.batch_source = tk.StringVar()
+        self.batch_concurrent_files = tk.StringVar(value="1")
+        self.resume_extraction = tk.BooleanVar(value=True)
+        self.whisper_low_memory = tk.BooleanVar(value=False)
         
         # Merge Variables
         self.merge_video_file = tk.StringVar()
         self.merge_srt_file = tk.StringVar()
         self.merge_output_file = tk.StringVar()
+        self.merge_mode = tk.StringVar(value="burn")
+        self.merge_segments = tk.StringVar(value="1")
+        self.batch_merge_videos = tk.StringVar()
+        self.batch_merge_srts = tk.StringVar()
+        self.batch_merge_output = tk.StringVar()
+        self.batch_merge_workers = tk.StringVar(value=str(DEFAULT_MERGE_WORKERS))
+        self.batch_merge_retries = tk.StringVar(value=str(DEFAULT_MERGE_RETRIES))
         
         # Font settings for merge
         self.font_size = tk.StringVar(value="16")
@@ -72,6 +102,10 @@ class SRTTranslatorGUI:
         self.video_codec = tk.StringVar(value="libx264")
         self.audio_codec = tk.StringVar(value="aac")
         self.video_quality = tk.StringVar(value="23")
+        self.encoder_speed = tk.StringVar(value="balanced")
+        self.encoder_tune = tk.StringVar(value="none")
+        self.encoder_threads = tk.StringVar(value="0")
+        self.audio_passthrough = tk.BooleanVar(value=True)
         self.subtitle_encoding = tk.StringVar(value="utf-8")
         
         # Control flags
@@ -86,6 +120,9 @@ class SRTTranslatorGUI:
         
         self.setup_ui()
         
+        if warm_up:
+            self.root.after(WARM_UP_DELAY_MS, self.start_module_warm_up)
+        
     def setup_styles(self):
         """Configure ttk styles for better appearance"""
         style = ttk.Style()
@@ -301,6 +338,7 @@ class SRTTranslatorGUI:
         model_combo.grid(row=1, column=1, sticky=(tk.W, tk.E), pady=(0, 10), padx=(15, 0))
         self.setup_combobox_font(model_combo, 18)
         self.disable_combobox_mousewheel(model_combo, canvas)
+        model_combo.bind("<<ComboboxSelected>>", self.on_gemini_model_selected)
         
         # Proxy settings
         ttk.Label(api_frame, text="Proxy:", style='Section.TLabel').grid(row=2, column=0, sticky=tk.W, pady=(10, 0))
@@ -312,6 +350,27 @@ class SRTTranslatorGUI:
         proxy_entry = ttk.Entry(proxy_frame, textvariable=self.proxy_url, font=('Consolas', 18))
         proxy_entry.grid(row=0, column=1, sticky=(tk.W, tk.E), padx=(15, 0))
         
+        # Concurrent batches
+        ttk.Label(api_frame, text="Concurrency:", style='Section.TLabel').grid(row=3, column=0, sticky=tk.W, pady=(10, 0))
+        concurrency_spin = ttk.Spinbox(api_frame, textvariable=self.translate_concurrency, from_=1, to=32, width=8, font=('Consolas', 18))
+        concurrency_spin.grid(row=3, column=1, sticky=tk.W, pady=(10, 0), padx=(15, 0))
+        ttk.Checkbutton(api_frame, text="Use Translation Cache", variable=self.use_translation_cache, style='Large.TCheckbutton').grid(row=3, column=2, sticky=tk.E, pady=(10, 0))
+        
+        # Rate limits (quota of the selected model)
+        ttk.Label(api_frame, text="Rate Limit:", style='Section.TLabel').grid(row=4, column=0, sticky=tk.W, pady=(10, 0))
+        rate_frame = ttk.Frame(api_frame)
+        rate_frame.grid(row=4, column=1, sticky=(tk.W, tk.E), pady=(10, 0), padx=(15, 0))
+        ttk.Label(rate_frame, text="RPM:", style='Section.TLabel').pack(side=tk.LEFT)
+        ttk.Entry(rate_frame, textvariable=self.rate_limit_rpm, width=8, font=('Consolas', 18)).pack(side=tk.LEFT, padx=(10, 20))
+        ttk.Label(rate_frame, text="TPM:", style='Section.TLabel').pack(side=tk.LEFT)
+        ttk.Entry(rate_frame, textvariable=self.rate_limit_tpm, width=10, font=('Consolas', 18)).pack(side=tk.LEFT, padx=(10, 0))
+        
+        # Batch size budget (batches adapt below/above the initial cue count)
+        ttk.Label(api_frame, text="Batch Tokens:", style='Section.TLabel').grid(row=5, column=0, sticky=tk.W, pady=(10, 0))
+        batch_tokens_spin = ttk.Spinbox(api_frame, textvariable=self.batch_token_budget, from_=100, to=20000, increment=100, width=8, font=('Consolas', 18))
+        batch_tokens_spin.grid(row=5, column=1, sticky=tk.W, pady=(10, 0), padx=(15, 0))
+        ttk.Checkbutton(api_frame, text="Resume Interrupted Job", variable=self.resume_translation, style='Large.TCheckbutton').grid(row=5, column=2, sticky=tk.E, pady=(10, 0))
+        
         # File Configuration Section - full width
         file_frame = ttk.LabelFrame(main_frame, text="Files & Language", padding="15")
         file_frame.pack(fill=tk.X, pady=(0, 20))
@@ -369,6 +428,9 @@ class SRTTranslatorGUI:
                                                  font=('Consolas', 16), wrap=tk.WORD,
                                                  bg='#f8f9fa', relief='flat', borderwidth=1)
         self.log_text.pack(fill='both', expand=True)
+        self.translate_log_view = QueuedTextLog(self.root, self.log_text, on_message=lambda m: self.status_var.set(m), name="translate")
+        ttk.Button(log_frame, text="Open Full Log", command=lambda: self.open_full_log(self.translate_log_view),
+                   style='Small.TButton').pack(anchor=tk.E, pady=(0, 8), before=self.log_text.frame)
         
         def _on_translate_log_mousewheel(event):
             self.log_text.yview_scroll(int(-1*(event.delta/120)), "units")
@@ -440,6 +502,21 @@ class SRTTranslatorGUI:
         whisper_output_entry.grid(row=1, column=1, sticky=(tk.W, tk.E), pady=(0, 10), padx=(15, 10))
         ttk.Button(io_frame, text="Save As", command=self.browse_whisper_output, style='Small.TButton').grid(row=1, column=2, pady=(0, 10))
         
+        # Batch Section - a folder or glob pattern of videos
+        batch_frame = ttk.LabelFrame(whisper_main, text="Batch Folder", padding="15")
+        batch_frame.pack(fill=tk.X, pady=(0, 20))
+        batch_frame.columnconfigure(1, weight=1)
+        
+        ttk.Label(batch_frame, text="Folder / Pattern:", style='Section.TLabel').grid(row=0, column=0, sticky=tk.W, pady=(0, 10))
+        batch_entry = ttk.Entry(batch_frame, textvariable=self.batch_source, font=('Consolas', 18))
+        batch_entry.grid(row=0, column=1, sticky=(tk.W, tk.E), pady=(0, 10), padx=(15, 10))
+        ttk.Button(batch_frame, text="Browse", command=self.browse_batch_folder, style='Small.TButton').grid(row=0, column=2, pady=(0, 10))
+        
+        ttk.Label(batch_frame, text="Files at Once:", style='Section.TLabel').grid(row=1, column=0, sticky=tk.W)
+        files_spin = ttk.Spinbox(batch_frame, textvariable=self.batch_concurrent_files, from_=1, to=16, width=6, font=('Consolas', 16))
+        files_spin.grid(row=1, column=1, sticky=tk.W, padx=(15, 0))
+        ttk.Label(batch_frame, text="SRT files are written next to each video; up-to-date ones are skipped", style='Info.TLabel').grid(row=2, column=0, columnspan=3, sticky=tk.W, pady=(8, 0))
+        
         # Model Configuration Section - full width
         model_frame = ttk.LabelFrame(whisper_main, text="Configuration", padding="15")
         model_frame.pack(fill=tk.X, pady=(0, 20))
@@ -470,6 +547,32 @@ class SRTTranslatorGUI:
         self.disable_combobox_mousewheel(model_combo, canvas)
         model_combo.bind("<<ComboboxSelected>>", self.on_model_selected)
         
+        # Second row: parallel chunked transcription (1 worker = sequential)
+        config_row2 = ttk.Frame(model_frame)
+        config_row2.pack(fill=tk.X, pady=(0, 12))
+        
+        ttk.Label(config_row2, text="Profile:", style='Section.TLabel').pack(side=tk.LEFT)
+        profile_combo = ttk.Combobox(config_row2, textvariable=self.whisper_profile, state="readonly", width=10)
+        profile_combo['values'] = list(WHISPER_PROFILES)
+        profile_combo.pack(side=tk.LEFT, padx=(12, 30))
+        self.setup_combobox_font(profile_combo, 16)
+        self.disable_combobox_mousewheel(profile_combo, canvas)
+        
+        ttk.Label(config_row2, text="Parallel Workers:", style='Section.TLabel').pack(side=tk.LEFT)
+        workers_spin = ttk.Spinbox(config_row2, textvariable=self.whisper_workers, from_=1, to=64, width=6, font=('Consolas', 16))
+        workers_spin.pack(side=tk.LEFT, padx=(12, 30))
+        
+        ttk.Label(config_row2, text="Threads/Worker:", style='Section.TLabel').pack(side=tk.LEFT)
+        threads_spin = ttk.Spinbox(config_row2, textvariable=self.whisper_threads_per_worker, from_=0, to=64, width=6, font=('Consolas', 16))
+        threads_spin.pack(side=tk.LEFT, padx=(12, 30))
+        
+        ttk.Checkbutton(config_row2, text="Resume", variable=self.resume_extraction, style='Large.TCheckbutton').pack(side=tk.LEFT, padx=(0, 15))
+        ttk.Checkbutton(config_row2, text="Low Memory", variable=self.whisper_low_memory, style='Large.TCheckbutton').pack(side=tk.LEFT)
+        ttk.Label(model_frame, text="fastest: int8, beam 1, VAD | balanced: int8, beam 3, VAD | accurate: full precision, beam 5", style='Info.TLabel').pack(anchor=tk.W)
+        ttk.Label(model_frame, text="Workers > 1 splits long audio at silences and transcribes chunks in parallel (0 threads = auto)", style='Info.TLabel').pack(anchor=tk.W)
+        ttk.Label(model_frame, text="Resume continues a stopped or crashed extraction from its last checkpoint", style='Info.TLabel').pack(anchor=tk.W)
+        ttk.Label(model_frame, text="Low Memory streams the cached audio in windows (1 worker, needs FFmpeg); peak RAM is logged", style='Info.TLabel').pack(anchor=tk.W)
+        
         # Local Model Path
         ttk.Label(model_frame, text="Local Model Path:", style='Section.TLabel').pack(anchor=tk.W, pady=(12, 8))
         model_path_frame = ttk.Frame(model_frame)
@@ -478,7 +581,8 @@ class SRTTranslatorGUI:
         model_path_entry = ttk.Entry(model_path_frame, textvariable=self.local_model_path, font=('Consolas', 18))
         model_path_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
         ttk.Button(model_path_frame, text="Browse", command=self.browse_local_model, style='Small.TButton').pack(side=tk.LEFT, padx=(8, 6))
-        ttk.Button(model_path_frame, text="Help", command=self.show_model_help, style='Small.TButton').pack(side=tk.LEFT)
+        ttk.Button(model_path_frame, text="Help", command=self.show_model_help, style='Small.TButton').pack(side=tk.LEFT, padx=(0, 6))
+        ttk.Button(model_path_frame, text="Unload", command=self.unload_whisper_models, style='Small.TButton').pack(side=tk.LEFT)
         
         ttk.Label(model_frame, text="Leave empty to download automatically", style='Info.TLabel').pack(anchor=tk.W)
         
@@ -490,6 +594,10 @@ class SRTTranslatorGUI:
                                     command=self.start_extraction, style='Action.TButton')
         self.extract_btn.pack(side=tk.LEFT, padx=(0, 15))
         
+        self.batch_extract_btn = ttk.Button(button_frame, text="📂 Extract Folder", 
+                                          command=self.start_batch_extraction, style='Action.TButton')
+        self.batch_extract_btn.pack(side=tk.LEFT, padx=(0, 15))
+        
         self.stop_extract_btn = ttk.Button(button_frame, text="⏹️ Stop", 
                                          command=self.stop_extraction_process, 
                                          state="disabled", style='Stop.TButton')
@@ -514,6 +622,9 @@ class SRTTranslatorGUI:
                                                    font=('Consolas', 16), wrap=tk.WORD,
                                                    bg='#f8f9fa', relief='flat', borderwidth=1)
         self.whisper_log.pack(fill='both', expand=True)
+        self.whisper_log_view = QueuedTextLog(self.root, self.whisper_log, on_message=lambda m: self.status_var.set(m), name="whisper")
+        ttk.Button(log_frame, text="Open Full Log", command=lambda: self.open_full_log(self.whisper_log_view),
+                   style='Small.TButton').pack(anchor=tk.E, pady=(0, 8), before=self.whisper_log.frame)
         
         def _on_log_mousewheel(event):
             self.whisper_log.yview_scroll(int(-1*(event.delta/120)), "units")
@@ -590,6 +701,16 @@ class SRTTranslatorGUI:
         merge_output_entry.grid(row=2, column=1, sticky=(tk.W, tk.E), pady=(0, 10), padx=(15, 10))
         ttk.Button(files_section, text="Save As", command=self.browse_merge_output_file, style='Small.TButton').grid(row=2, column=2, pady=(0, 10))
         
+        # Merge mode: burn-in re-encodes, mux only adds a subtitle track
+        ttk.Label(files_section, text="Mode:", style='Section.TLabel').grid(row=3, column=0, sticky=tk.W, pady=(0, 10))
+        mode_frame = ttk.Frame(files_section)
+        mode_frame.grid(row=3, column=1, columnspan=2, sticky=tk.W, pady=(0, 10), padx=(15, 0))
+        ttk.Radiobutton(mode_frame, text="Burn-in (re-encode)", variable=self.merge_mode, value="burn").pack(side=tk.LEFT, padx=(0, 20))
+        ttk.Radiobutton(mode_frame, text="Soft subtitles (mux, no re-encode)", variable=self.merge_mode, value="mux").pack(side=tk.LEFT)
+        self.merge_estimate_label = ttk.Label(files_section, text="Select a video to estimate merge time", style='Info.TLabel')
+        self.merge_estimate_label.grid(row=4, column=0, columnspan=3, sticky=tk.W)
+        self.merge_mode.trace_add('write', lambda *args: self.update_merge_estimate())
+        
         # Font Settings Section
         font_section = ttk.LabelFrame(merge_main, text="Font Settings", padding="15")
         font_section.pack(fill=tk.X, pady=(0, 20))
@@ -701,6 +822,7 @@ class SRTTranslatorGUI:
         video_codec_combo.pack(side=tk.LEFT, padx=(10, 20))
         self.setup_combobox_font(video_codec_combo, 16)
         self.disable_combobox_mousewheel(video_codec_combo, canvas)
+        video_codec_combo.bind("<<ComboboxSelected>>", lambda event: self.update_merge_estimate())
         
         ttk.Label(codec_row, text="Audio Codec:", style='Section.TLabel').pack(side=tk.LEFT)
         audio_codec_combo = ttk.Combobox(codec_row, textvariable=self.audio_codec, width=12)
@@ -713,6 +835,39 @@ class SRTTranslatorGUI:
         quality_spin = ttk.Spinbox(codec_row, textvariable=self.video_quality, from_=0, to=51, width=8, font=('Consolas', 16))
         quality_spin.pack(side=tk.LEFT, padx=(10, 0))
         
+        # Encoder speed row
+        speed_row = ttk.Frame(advanced_section)
+        speed_row.pack(fill=tk.X, pady=(0, 12))
+        
+        ttk.Label(speed_row, text="Speed:", style='Section.TLabel').pack(side=tk.LEFT)
+        speed_combo = ttk.Combobox(speed_row, textvariable=self.encoder_speed, width=10, state="readonly")
+        speed_combo['values'] = list(ENCODER_SPEED_PRESETS)
+        speed_combo.pack(side=tk.LEFT, padx=(10, 20))
+        self.setup_combobox_font(speed_combo, 16)
+        self.disable_combobox_mousewheel(speed_combo, canvas)
+        
+        ttk.Label(speed_row, text="Tune:", style='Section.TLabel').pack(side=tk.LEFT)
+        tune_combo = ttk.Combobox(speed_row, textvariable=self.encoder_tune, width=12, state="readonly")
+        tune_combo['values'] = ["none"] + X264_TUNES
+        tune_combo.pack(side=tk.LEFT, padx=(10, 20))
+        self.setup_combobox_font(tune_combo, 16)
+        self.disable_combobox_mousewheel(tune_combo, canvas)
+        
+        ttk.Label(speed_row, text="Threads:", style='Section.TLabel').pack(side=tk.LEFT)
+        threads_spin = ttk.Spinbox(speed_row, textvariable=self.encoder_threads, from_=0, to=64, width=6, font=('Consolas', 16))
+        threads_spin.pack(side=tk.LEFT, padx=(10, 20))
+        
+        ttk.Checkbutton(speed_row, text="Copy matching audio", variable=self.audio_passthrough).pack(side=tk.LEFT)
+        
+        # Segmented burn-in row
+        segments_row = ttk.Frame(advanced_section)
+        segments_row.pack(fill=tk.X, pady=(0, 12))
+        
+        ttk.Label(segments_row, text="Parallel Segments:", style='Section.TLabel').pack(side=tk.LEFT)
+        segments_spin = ttk.Spinbox(segments_row, textvariable=self.merge_segments, from_=0, to=32, width=6, font=('Consolas', 16))
+        segments_spin.pack(side=tk.LEFT, padx=(10, 15))
+        ttk.Label(segments_row, text="1 = single encode, 0 = auto (by CPU count)", style='Info.TLabel').pack(side=tk.LEFT)
+        
         # Encoding settings row
         encoding_row = ttk.Frame(advanced_section)
         encoding_row.pack(fill=tk.X)
@@ -724,6 +879,47 @@ class SRTTranslatorGUI:
         self.setup_combobox_font(encoding_combo, 16)
         self.disable_combobox_mousewheel(encoding_combo, canvas)
         
+        # Batch Merge Section - videos and SRTs paired by filename stem
+        batch_merge_section = ttk.LabelFrame(merge_main, text="Batch Merge", padding="15")
+        batch_merge_section.pack(fill=tk.X, pady=(0, 20))
+        batch_merge_section.columnconfigure(1, weight=1)
+        
+        for row, (label, variable, title) in enumerate([
+            ("Video Folder:", self.batch_merge_videos, "Select Video Folder"),
+            ("Subtitle Folder:", self.batch_merge_srts, "Select Subtitle Folder"),
+            ("Output Folder:", self.batch_merge_output, "Select Output Folder"),
+        ]):
+            ttk.Label(batch_merge_section, text=label, style='Section.TLabel').grid(row=row, column=0, sticky=tk.W, pady=(0, 10))
+            ttk.Entry(batch_merge_section, textvariable=variable, font=('Consolas', 16)).grid(
+                row=row, column=1, sticky=(tk.W, tk.E), pady=(0, 10), padx=(15, 10))
+            ttk.Button(batch_merge_section, text="Browse", style='Small.TButton',
+                       command=lambda variable=variable, title=title: self.browse_batch_merge_folder(variable, title)).grid(
+                row=row, column=2, pady=(0, 10))
+        
+        workers_row = ttk.Frame(batch_merge_section)
+        workers_row.grid(row=3, column=0, columnspan=3, sticky=tk.W, pady=(0, 10))
+        ttk.Label(workers_row, text="Workers:", style='Section.TLabel').pack(side=tk.LEFT)
+        ttk.Spinbox(workers_row, textvariable=self.batch_merge_workers, from_=1, to=16, width=6,
+                    font=('Consolas', 16)).pack(side=tk.LEFT, padx=(10, 20))
+        ttk.Label(workers_row, text="Retries:", style='Section.TLabel').pack(side=tk.LEFT)
+        ttk.Spinbox(workers_row, textvariable=self.batch_merge_retries, from_=0, to=5, width=6,
+                    font=('Consolas', 16)).pack(side=tk.LEFT, padx=(10, 20))
+        ttk.Label(workers_row, text="Subtitle folder empty = next to each video; output folder empty = next to each video",
+                  style='Info.TLabel').pack(side=tk.LEFT)
+        
+        self.batch_merge_tree = ttk.Treeview(batch_merge_section, columns=("status", "progress", "speed", "attempts"), height=6)
+        self.batch_merge_tree.heading("#0", text="Video")
+        self.batch_merge_tree.heading("status", text="Status")
+        self.batch_merge_tree.heading("progress", text="Progress")
+        self.batch_merge_tree.heading("speed", text="Speed")
+        self.batch_merge_tree.heading("attempts", text="Attempts")
+        self.batch_merge_tree.column("#0", width=360)
+        for column in ("status", "progress", "speed", "attempts"):
+            self.batch_merge_tree.column(column, width=110, anchor=tk.CENTER)
+        self.batch_merge_tree.grid(row=4, column=0, columnspan=3, sticky=(tk.W, tk.E))
+        self.batch_merge_label = ttk.Label(batch_merge_section, text="No batch running", style='Info.TLabel')
+        self.batch_merge_label.grid(row=5, column=0, columnspan=3, sticky=tk.W, pady=(8, 0))
+        
         # Action buttons
         button_frame = ttk.Frame(merge_main)
         button_frame.pack(fill=tk.X, pady=25)
@@ -732,6 +928,14 @@ class SRTTranslatorGUI:
                                    command=self.start_merge, style='Action.TButton')
         self.merge_btn.pack(side=tk.LEFT, padx=(0, 15))
         
+        self.pipeline_btn = ttk.Button(button_frame, text="⚡ Extract + Translate + Merge", 
+                                      command=self.start_pipeline, style='Action.TButton')
+        self.pipeline_btn.pack(side=tk.LEFT, padx=(0, 15))
+        
+        self.batch_merge_btn = ttk.Button(button_frame, text="📦 Batch Merge", 
+                                         command=self.start_batch_merge, style='Action.TButton')
+        self.batch_merge_btn.pack(side=tk.LEFT, padx=(0, 15))
+        
         self.stop_merge_btn = ttk.Button(button_frame, text="⏹️ Stop", 
                                         command=self.stop_merge, 
                                         state="disabled", style='Stop.TButton')
@@ -770,6 +974,9 @@ class SRTTranslatorGUI:
                                                   font=('Consolas', 16), wrap=tk.WORD,
                                                   bg='#f8f9fa', relief='flat', borderwidth=1)
         self.merge_log.pack(fill='both', expand=True)
+        self.merge_log_view = QueuedTextLog(self.root, self.merge_log, on_message=self.update_merge_status, name="merge")
+        ttk.Button(log_frame, text="Open Full Log", command=lambda: self.open_full_log(self.merge_log_view),
+                   style='Small.TButton').pack(anchor=tk.E, pady=(0, 8), before=self.merge_log.frame)
         
         def _on_merge_log_mousewheel(event):
             self.merge_log.yview_scroll(int(-1*(event.delta/120)), "units")
@@ -836,6 +1043,13 @@ class SRTTranslatorGUI:
             self.whisper_output.set(filename)
             self.status_var.set(f"Subtitle output set: {os.path.basename(filename)}")
             
+    def browse_batch_folder(self):
+        """Browse for a folder of videos to extract in batch"""
+        directory = filedialog.askdirectory(title="Select Video Folder")
+        if directory:
+            self.batch_source.set(directory)
+            self.status_var.set(f"Batch folder selected: {directory}")
+            
     def browse_local_model(self):
         """Browse for local Whisper model directory"""
         directory = filedialog.askdirectory(
@@ -850,6 +1064,11 @@ class SRTTranslatorGUI:
         self.whisper_log_message("Stopping extraction...")
         self.stop_extract_btn.config(state="disabled")
         
+    def unload_whisper_models(self):
+        """Release the Whisper models kept in memory between extractions"""
+        count = evict_whisper_models()
+        self.whisper_log_message(f"Unloaded {count} cached model(s)")
+        
     def stop_translation_process(self):
         """Stop the translation process"""
         self.stop_translation = True
@@ -872,6 +1091,13 @@ class SRTTranslatorGUI:
         else:  # Cancel
             return "cancel"
     
+    def on_gemini_model_selected(self, event):
+        """Fill in the default quota of the selected Gemini model"""
+        rpm, tpm = MODEL_RATE_LIMITS.get(self.model_name.get(), DEFAULT_RATE_LIMIT)
+        self.rate_limit_rpm.set(str(rpm))
+        self.rate_limit_tpm.set(str(tpm))
+        self.batch_token_budget.set(str(batch_token_budget(self.model_name.get())))
+    
     def on_model_selected(self, event):
         """Handle model selection from dropdown"""
         selected_model = self.selected_model.get()
@@ -1130,19 +1356,28 @@ English-specific models (*.en) are optimized for English only."""
             style='Small.TButton'
         ).pack()
         
+    def start_module_warm_up(self):
+        """Import the speech and translation stacks in the background so the first action is fast"""
+        def warm_up():
+            for name in WARM_UP_MODULES:
+                try:
+                    importlib.import_module(name)
+                except Exception as e:
+                    print(f"Background import of {name} failed: {e}")
+        threading.Thread(target=warm_up, daemon=True).start()
+        
+    def open_full_log(self, log_view):
+        """Open the complete log file behind a (trimmed) log widget"""
+        if not log_view.open_full_log():
+            messagebox.showinfo("Log", "No log file has been written yet.")
+        
     def log(self, message):
-        """Add message to log area"""
-        self.log_text.insert(tk.END, f"{message}\n")
-        self.log_text.see(tk.END)
-        self.status_var.set(message)
-        self.root.update()
+        """Add message to log area (safe to call from worker threads)"""
+        self.translate_log_view.write(message)
         
     def whisper_log_message(self, message):
-        """Add message to whisper log area"""
-        self.whisper_log.insert(tk.END, f"{message}\n")
-        self.whisper_log.see(tk.END)
-        self.status_var.set(message)
-        self.root.update()
+        """Add message to whisper log area (safe to call from worker threads)"""
+        self.whisper_log_view.write(message)
         
     def translate_srt_file(self):
         """Use existing translate_srt function with progress tracking"""
@@ -1154,17 +1389,14 @@ English-specific models (*.en) are optimized for English only."""
             
             import srt
             subtitles = list(srt.parse(srt_content))
-            batch_size = 10
-            total_batches = len(subtitles) // batch_size + (1 if len(subtitles) % batch_size else 0)
             
-            self.log(f"Found {len(subtitles)} subtitles, processing in {total_batches} batches")
+            self.log(f"Found {len(subtitles)} subtitles")
             
             # Set progress bar maximum
-            self.progress.config(maximum=total_batches)
-            self.progress['value'] = 0
+            self.root.after(0, self.set_translate_progress, 0, len(subtitles))
             
             # Use custom translation logic to track progress
-            success = self.translate_with_progress(subtitles, batch_size, total_batches)
+            success = self.translate_with_progress(subtitles)
             
             if success and not self.stop_translation:
                 self.log("✅ Translation completed successfully!")
@@ -1182,56 +1414,47 @@ English-specific models (*.en) are optimized for English only."""
         finally:
             self.translate_btn.config(state="normal")
             self.stop_translate_btn.config(state="disabled")
-            self.progress['value'] = 0
+            self.root.after(0, self.set_translate_progress, 0, 1)
             self.stop_translation = False
             
-    def translate_with_progress(self, subtitles, batch_size, total_batches):
+    def set_translate_progress(self, completed, total):
+        self.progress.config(maximum=max(total, 1))
+        self.progress['value'] = completed
+            
+    def translate_with_progress(self, subtitles):
         """Custom translation with progress tracking"""
         import srt
-        import time
-                
-        translated_subs = []
         
-        for i in range(0, len(subtitles), batch_size):
-            # Check if user requested stop
-            if self.stop_translation:
-                self.log("Translation stopped by user request.")
-                return False
-                
-            current_batch = i // batch_size + 1
-            self.log(f"Translating batch {current_batch} of {total_batches}...")
-            
-            batch = subtitles[i:i+batch_size]
-            batch_text = "\n".join(sub.content for sub in batch)
-            
-            # Log original text (first few lines for preview)
-            preview_lines = batch_text.split('\n')[:3]
-            self.log(f"Original text preview: {' | '.join(preview_lines)}")
-            
-            try:
-                translated = translate_text(batch_text, self.target_lang.get())
-                
-                # Log translated text preview
-                translated_preview = translated.strip().split('\n')[:3]
-                self.log(f"Translated preview: {' | '.join(translated_preview)}")
-                
-            except Exception as e:
-                self.log(f"API error in batch {current_batch}: {e}")
-                # Continue with original text if translation fails
-                translated = batch_text
-            
-            translated_lines = translated.strip().split("\n")
-            for j, sub in enumerate(batch):
-                if j < len(translated_lines):
-                    sub.content = translated_lines[j]
-                translated_subs.append(sub)
-            
-            # Update progress bar
-            self.progress['value'] = current_batch
-            self.root.update()
-            
-            self.log(f"Batch {current_batch} completed.")
-            time.sleep(2)  # Avoid API rate limiting
+        try:
+            concurrency = max(1, int(self.translate_concurrency.get()))
+        except ValueError:
+            concurrency = DEFAULT_CONCURRENCY
+        try:
+            token_budget = max(1, int(self.batch_token_budget.get()))
+        except ValueError:
+            token_budget = None
+        
+        def on_progress(completed, total):
+            # Update progress bar (cache hits can shrink the number of cues to translate)
+            self.root.after(0, self.set_translate_progress, completed, total)
+        
+        cache = open_translation_cache(log_callback=self.log) if self.use_translation_cache.get() else None
+        try:
+            translated_subs = translate_subtitles(
+                subtitles,
+                self.target_lang.get(),
+                concurrency=concurrency,
+                token_budget=token_budget,
+                cache=cache,
+                log_callback=self.log,
+                progress_callback=on_progress,
+                stop_callback=lambda: self.stop_translation,
+                output_file=self.output_file.get(),
+                resume=self.resume_translation.get()
+            )
+        finally:
+            if cache is not None:
+                cache.close()
         
         if not self.stop_translation:
             # Save translated file
@@ -1271,7 +1494,12 @@ English-specific models (*.en) are optimized for English only."""
                 local_model_path=local_path,
                 device=self.whisper_device.get(),
                 log_callback=self.whisper_log_message,
-                stop_callback=lambda: self.stop_extraction
+                stop_callback=lambda: self.stop_extraction,
+                profile=self.whisper_profile.get(),
+                parallel_workers=max(1, int(self.whisper_workers.get() or 1)),
+                threads_per_worker=max(0, int(self.whisper_threads_per_worker.get() or 0)),
+                resume=self.resume_extraction.get(),
+                low_memory=self.whisper_low_memory.get()
             )
             
             if not self.stop_extraction:
@@ -1281,6 +1509,8 @@ English-specific models (*.en) are optimized for English only."""
                 messagebox.showinfo("Success", "Subtitle extraction completed!")
             else:
                 self.whisper_log_message("⚠️ Extraction stopped by user.")
+                if os.path.exists(output_file):
+                    self.whisper_log_message(f"Partial subtitles saved to: {output_file}")
                 self.status_var.set("Extraction stopped by user")
                 messagebox.showinfo("Stopped", "Subtitle extraction stopped by user.")
             
@@ -1290,6 +1520,7 @@ English-specific models (*.en) are optimized for English only."""
             messagebox.showerror("Error", error_msg)
         finally:
             self.extract_btn.config(state="normal")
+            self.batch_extract_btn.config(state="normal")
             self.stop_extract_btn.config(state="disabled")
             self.whisper_progress.stop()
             self.stop_extraction = False 
@@ -1308,12 +1539,92 @@ English-specific models (*.en) are optimized for English only."""
         # Reset stop flag and disable/enable buttons
         self.stop_extraction = False
         self.extract_btn.config(state="disabled")
+        self.batch_extract_btn.config(state="disabled")
         self.stop_extract_btn.config(state="normal")
         self.whisper_log_message("Starting extraction...")
         
         # Run extraction in new thread
         threading.Thread(target=self.extract_subtitles, daemon=True).start()
             
+    def start_batch_extraction(self):
+        """Start batch extraction of a folder (run in new thread)"""
+        if not self.batch_source.get():
+            messagebox.showerror("Error", "Please select a video folder or enter a pattern")
+            return
+        local_path = self.local_model_path.get().strip()
+        if not local_path or not os.path.exists(local_path):
+            messagebox.showerror("Error", "Please select or download a local model first")
+            return
+        
+        self.stop_extraction = False
+        self.extract_btn.config(state="disabled")
+        self.batch_extract_btn.config(state="disabled")
+        self.stop_extract_btn.config(state="normal")
+        self.whisper_log_message("Starting batch extraction...")
+        
+        threading.Thread(target=self.batch_extract_subtitles, args=(local_path,), daemon=True).start()
+        
+    def batch_extract_subtitles(self, local_path):
+        """Extract subtitles for every video in the batch folder"""
+        try:
+            self.whisper_progress.start()
+            summary = run_batch(
+                self.batch_source.get(),
+                local_path,
+                device=self.whisper_device.get(),
+                concurrent_files=max(1, int(self.batch_concurrent_files.get() or 1)),
+                log_callback=self.whisper_log_message,
+                stop_callback=lambda: self.stop_extraction,
+                profile=self.whisper_profile.get(),
+                parallel_workers=max(1, int(self.whisper_workers.get() or 1)),
+                threads_per_worker=max(0, int(self.whisper_threads_per_worker.get() or 0)),
+                resume=self.resume_extraction.get(),
+                low_memory=self.whisper_low_memory.get()
+            )
+            if self.stop_extraction:
+                self.whisper_log_message("⚠️ Batch stopped by user. Unfinished files will run next time.")
+                self.status_var.set("Batch extraction stopped by user")
+            else:
+                self.status_var.set(f"Batch done: {summary['done']} extracted, {summary['failed']} failed, {summary['skipped']} skipped")
+                messagebox.showinfo("Batch Complete", f"{summary['done']} extracted, {summary['failed']} failed, {summary['skipped']} skipped")
+        except Exception as e:
+            error_msg = f"Error during batch extraction: {e}"
+            self.whisper_log_message(error_msg)
+            messagebox.showerror("Error", error_msg)
+        finally:
+            self.extract_btn.config(state="normal")
+            self.batch_extract_btn.config(state="normal")
+            self.stop_extract_btn.config(state="disabled")
+            self.whisper_progress.stop()
+            self.stop_extraction = False
+            
+    def configure_translation_api(self):
+        """Apply the proxy, Gemini model and rate limit from the translation tab; False on failure"""
+        # Set proxy
+        if self.proxy_enabled.get():
+            os.environ["HTTP_PROXY"] = self.proxy_url.get()
+            os.environ["HTTPS_PROXY"] = self.proxy_url.get()
+            self.log(f"Proxy enabled: {self.proxy_url.get()}")
+        else:
+            os.environ.pop("HTTP_PROXY", None)
+            os.environ.pop("HTTPS_PROXY", None)
+            self.log("No proxy used")
+            
+        # Configure Gemini API (update the global configuration)
+        try:
+            configure_gemini(self.api_key.get(), self.model_name.get())
+            limiter = configure_rate_limit(
+                self.model_name.get(),
+                int(self.rate_limit_rpm.get() or 0) or None,
+                int(self.rate_limit_tpm.get() or 0) or None
+            )
+            self.log(f"API configuration successful with model: {self.model_name.get()}")
+            self.log(f"Rate limit: {limiter.requests_per_minute} requests/min, {limiter.tokens_per_minute} tokens/min")
+        except Exception as e:
+            messagebox.showerror("Error", f"API configuration failed: {e}")
+            return False
+        return True
+
     def start_translation(self):
         """Start translation (run in new thread)"""
         # Validate input
@@ -1333,25 +1644,7 @@ English-specific models (*.en) are optimized for English only."""
             messagebox.showerror("Error", "Please set output file path")
             return
             
-        # Set proxy
-        if self.proxy_enabled.get():
-            os.environ["HTTP_PROXY"] = self.proxy_url.get()
-            os.environ["HTTPS_PROXY"] = self.proxy_url.get()
-            self.log(f"Proxy enabled: {self.proxy_url.get()}")
-        else:
-            os.environ.pop("HTTP_PROXY", None)
-            os.environ.pop("HTTPS_PROXY", None)
-            self.log("No proxy used")
-            
-        # Configure Gemini API (update the global configuration)
-        try:
-            genai.configure(api_key=self.api_key.get())
-            # Update the global model in the imported module
-            import gemini_srt_translate
-            gemini_srt_translate.model = genai.GenerativeModel(self.model_name.get())
-            self.log(f"API configuration successful with model: {self.model_name.get()}")
-        except Exception as e:
-            messagebox.showerror("Error", f"API configuration failed: {e}")
+        if not self.configure_translation_api():
             return
             
         # Disable button, start progress bar
@@ -1374,6 +1667,7 @@ English-specific models (*.en) are optimized for English only."""
         if filename:
             self.merge_video_file.set(filename)
             self.status_var.set(f"Video selected: {os.path.basename(filename)}")
+            self.update_merge_estimate()
             # Auto-set output filename
             if not self.merge_output_file.get():
                 base_name = os.path.splitext(filename)[0]
@@ -1480,116 +1774,77 @@ English-specific models (*.en) are optimized for English only."""
             pass
     
     def merge_log_message(self, message):
-        """Add message to merge log"""
-        self.merge_log.insert(tk.END, f"{message}\n")
-        self.merge_log.see(tk.END)
-        
+        """Add message to merge log (safe to call from worker threads)"""
+        self.merge_log_view.write(message)
+    
+    def update_merge_status(self, message):
+        """Status bar follow-up for drained merge log messages"""
         # Only update status bar for non-error messages
         if not any(keyword in message.lower() for keyword in ['error', 'failed', 'unable', 'invalid', 'cannot']):
             # Update status bar only for progress or success messages
             if any(keyword in message.lower() for keyword in ['starting', 'completed', 'processing', 'merge']):
                 self.status_var.set("Processing video merge...")
+    
+    def update_merge_estimate(self):
+        """Estimate both merge modes for the selected video in the background (ffprobe can be slow)"""
+        video = self.merge_video_file.get()
+        if not video or not os.path.exists(video):
+            return
+        codec = self.video_codec.get()
+        
+        def estimate():
+            try:
+                burn = estimate_merge_seconds(video, "burn", codec)
+                mux = estimate_merge_seconds(video, "mux")
+            except Exception as e:
+                print(f"Merge estimate failed: {e}")
+                return
+            describe = lambda seconds: f"~{format_duration(seconds)}" if seconds is not None else "unknown"
+            text = f"Estimated time: burn-in ({codec}) {describe(burn)} | soft subtitles {describe(mux)}"
+            self.root.after(0, lambda: self.merge_estimate_label.config(text=text))
         
-        self.root.update()
+        threading.Thread(target=estimate, daemon=True).start()
+    
+    def merge_options(self):
+        """Encoding and subtitle style options from the merge tab, as build_ffmpeg_command keywords"""
+        return dict(
+            mode=self.merge_mode.get(),
+            video_codec=self.video_codec.get(),
+            audio_codec=self.audio_codec.get(),
+            video_quality=self.video_quality.get(),
+            speed_preset=self.encoder_speed.get(),
+            tune=None if self.encoder_tune.get() == "none" else self.encoder_tune.get(),
+            threads=int(self.encoder_threads.get() or 0),
+            audio_passthrough=self.audio_passthrough.get(),
+            font_name=self.font_name.get(),
+            font_size=self.font_size.get(),
+            font_color=self.font_color.get(),
+            outline_color=self.font_outline_color.get(),
+            outline_width=self.font_outline_width.get(),
+            bold=self.font_bold.get(),
+            italic=self.font_italic.get(),
+            position=self.subtitle_position.get(),
+            margin_vertical=self.margin_vertical.get(),
+            margin_horizontal=self.margin_horizontal.get()
+        )
     
     def build_ffmpeg_command(self):
         """Build FFmpeg command for merging"""
-        if not self.merge_video_file.get() or not self.merge_srt_file.get() or not self.merge_output_file.get():
-            raise ValueError("Please select all required files")
-        
-        # Normalize file paths to handle Windows paths and special characters
-        video_path = os.path.normpath(self.merge_video_file.get())
-        srt_path = os.path.normpath(self.merge_srt_file.get())
-        output_path = os.path.normpath(self.merge_output_file.get())
-        
-        # Convert Windows paths to forward slashes for FFmpeg
-        if os.name == 'nt':  # Windows
-            video_path = video_path.replace('\\', '/')
-            srt_path = srt_path.replace('\\', '/')
-            srt_path = srt_path.replace(':', '\\:')
-            output_path = output_path.replace('\\', '/')
-        
-        # Build subtitle filter
-        font_style = []
-        
-        # Font family and size
-        font_style.append(f"FontName={self.font_name.get()}")
-        font_style.append(f"FontSize={self.font_size.get()}")
-        
-        # Colors (convert hex to ASS BGR format)
-        if self.font_color.get():
-            font_color_hex = self.font_color.get().lstrip('#')
-            if len(font_color_hex) == 6:  # Valid hex color
-                # Convert RGB to BGR for ASS format
-                r = font_color_hex[0:2]
-                g = font_color_hex[2:4] 
-                b = font_color_hex[4:6]
-                bgr_color = f"{b}{g}{r}"  # Convert to BGR
-                font_style.append(f"PrimaryColour=&H{bgr_color}")
-        
-        if self.font_outline_color.get():
-            outline_color_hex = self.font_outline_color.get().lstrip('#')
-            if len(outline_color_hex) == 6:  # Valid hex color
-                # Convert RGB to BGR for ASS format
-                r = outline_color_hex[0:2]
-                g = outline_color_hex[2:4]
-                b = outline_color_hex[4:6]
-                bgr_color = f"{b}{g}{r}"  # Convert to BGR
-                font_style.append(f"OutlineColour=&H{bgr_color}")
-        
-        font_style.append(f"Outline={self.font_outline_width.get()}")
-        
-        # Bold and Italic
-        if self.font_bold.get():
-            font_style.append("Bold=1")
-        if self.font_italic.get():
-            font_style.append("Italic=1")
-        
-        # Position
-        if self.subtitle_position.get() == "top":
-            font_style.append(f"MarginV={self.margin_vertical.get()}")
-            font_style.append("Alignment=8")  # Top center
-        elif self.subtitle_position.get() == "center":
-            font_style.append("Alignment=5")  # Middle center
-        else:  # bottom
-            font_style.append(f"MarginV={self.margin_vertical.get()}")
-            font_style.append("Alignment=2")  # Bottom center
-        
-        font_style.append(f"MarginL={self.margin_horizontal.get()}")
-        font_style.append(f"MarginR={self.margin_horizontal.get()}")
-        
-        style_string = ",".join(font_style)
-        
-        # Build FFmpeg command with proper escaping
-        # For Windows paths with colons, use single quotes to wrap the entire path
-        subtitles_filter = f"subtitles='{srt_path}':force_style='{style_string}'"
-        
-        cmd = [
-            "ffmpeg", "-y",
-            "-i", video_path,
-            "-vf", subtitles_filter,
-            "-c:v", self.video_codec.get(),
-            "-c:a", self.audio_codec.get()
-        ]
-        
-        # Add CRF if using x264 or x265
-        if self.video_codec.get() in ["libx264", "libx265"]:
-            cmd.extend(["-crf", self.video_quality.get()])
-        
-        cmd.append(output_path)
-        
-        return cmd
+        return build_ffmpeg_command(
+            self.merge_video_file.get(),
+            self.merge_srt_file.get(),
+            self.merge_output_file.get(),
+            **self.merge_options()
+        )
     
     def start_merge(self):
         """Start video merging process"""
         try:
             # Validate inputs
-            cmd = self.build_ffmpeg_command()
+            self.build_ffmpeg_command()
             
             # Check if FFmpeg is available
-            try:
-                subprocess.run(["ffmpeg", "-version"], capture_output=True, check=True)
-            except (subprocess.CalledProcessError, FileNotFoundError):
+            if not ffmpeg_available():
                 messagebox.showerror("Error", 
                     "FFmpeg not found. Please install FFmpeg and add it to your PATH.\n\n"
                     "Download from: https://ffmpeg.org/download.html")
@@ -1597,14 +1852,21 @@ English-specific models (*.en) are optimized for English only."""
             
             self.is_merging = True
             self.merge_btn.config(state="disabled")
+            self.batch_merge_btn.config(state="disabled")
+            self.pipeline_btn.config(state="disabled")
             self.stop_merge_btn.config(state="normal")
             self.merge_progress.start()
             self.status_var.set("Starting video merge...")
             self.merge_log_message("Starting video processing...")
-            self.merge_log_message(f"Command: {' '.join(cmd)}")
+            if self.merge_mode.get() == "mux":
+                self.merge_log_message("Soft subtitle mode: streams are copied, font and codec settings do not apply")
             
-            # Run FFmpeg in separate thread
-            threading.Thread(target=self._merge_video_thread, args=(cmd,), daemon=True).start()
+            # Run FFmpeg in separate thread (it probes the source audio before building the final command)
+            try:
+                segments = max(0, int(self.merge_segments.get()))
+            except ValueError:
+                segments = 1
+            threading.Thread(target=self._merge_video_thread, args=(self.merge_options(), segments), daemon=True).start()
             
         except Exception as e:
             messagebox.showerror("Error", f"Error starting merge: {str(e)}")
@@ -1613,51 +1875,61 @@ English-specific models (*.en) are optimized for English only."""
         if hasattr(self, 'progress_label'):
             self.progress_label.config(text=progress_text)
     
-    def _merge_video_thread(self, cmd):
+    def update_merge_progress(self, progress):
+        """Show an FFmpeg progress snapshot; the bar turns determinate once a percentage is known"""
+        if progress["percent"] is not None:
+            if str(self.merge_progress['mode']) != 'determinate':
+                self.merge_progress.stop()
+                self.merge_progress.config(mode='determinate', maximum=100)
+            self.merge_progress['value'] = progress["percent"]
+        self.update_progress_label(f"⏳ {format_progress(progress)}")
+    
+    def reset_merge_progress(self):
+        self.merge_progress.stop()
+        self.merge_progress.config(mode='indeterminate')
+        self.merge_progress['value'] = 0
+    
+    def _merge_video_thread(self, options, segments=1):
         try:
             self.root.after(0, self.update_progress_label, "Starting FFmpeg process...")
+            options = probe_source_streams(self.merge_video_file.get(), options)
+            cmd = build_ffmpeg_command(self.merge_video_file.get(), self.merge_srt_file.get(),
+                                       self.merge_output_file.get(), **options)
+            self.root.after(0, self.merge_log_message, f"Command: {' '.join(cmd)}")
+            self.root.after(0, self.merge_log_message, f"Encoder flags: {encoder_summary(cmd)}")
 
-            startupinfo = None
-            if os.name == 'nt':
-                startupinfo = subprocess.STARTUPINFO()
-                startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+            def keep_process(process):
+                self.merge_process = process
 
-            self.merge_process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                universal_newlines=True,
-                encoding='utf-8',
-                errors='ignore',
-                bufsize=1,
-                startupinfo=startupinfo
+            stats = {}
+            callbacks = dict(
+                log_callback=lambda line: self.root.after(0, self.merge_log_message, line),
+                progress_callback=lambda progress: self.root.after(0, self.update_merge_progress, progress),
+                stop_callback=lambda: not self.is_merging,
+                process_callback=keep_process,
+                stats=stats
             )
-
-            for line in iter(self.merge_process.stderr.readline, ''):
-                if not self.is_merging:
-                    break 
-
-                line = line.strip()
-                if not line:
-                    continue
-
-                if line.startswith("frame=") and "time=" in line and "speed=" in line:
-                    self.root.after(0, self.update_progress_label, f"⏳ {line}")
-                else:
-                    self.root.after(0, self.merge_log_message, line)
-
-            self.merge_process.wait()
+            if segments != 1 and self.merge_mode.get() == "burn":
+                from segmented_merge import run_segmented_burn
+                returncode = run_segmented_burn(
+                    self.merge_video_file.get(), self.merge_srt_file.get(), self.merge_output_file.get(),
+                    segments=segments, **callbacks, **options
+                )
+            else:
+                returncode = run_ffmpeg(cmd, **callbacks)
             
-            if self.is_merging: 
-                if self.merge_process.returncode == 0:
+            if returncode is not None: 
+                record_merge_stats(cmd, stats)
+                if returncode == 0:
                     self.root.after(0, self.update_progress_label, "✅ Process completed successfully!")
                     self.root.after(0, self.merge_log_message, "✅ Video merge completed successfully!")
+                    self.root.after(0, self.merge_log_message, f"Encode stats: {format_merge_stats(stats)}")
                     self.status_var.set("Merge completed successfully!")
                     messagebox.showinfo("Success", f"Video saved to:\n{self.merge_output_file.get()}")
                 else:
-                    err_msg = f"❌ Process failed! (Return Code: {self.merge_process.returncode})"
+                    err_msg = f"❌ Process failed! (Return Code: {returncode})"
                     self.root.after(0, self.update_progress_label, err_msg)
-                    self.root.after(0, self.merge_log_message, f"❌ Merge failed with return code {self.merge_process.returncode}")
+                    self.root.after(0, self.merge_log_message, f"❌ Merge failed with return code {returncode}")
                     self.status_var.set("Merge failed. Check log for details.")
                     messagebox.showerror("Error", "Merge failed. Check the log for details.")
 
@@ -1670,8 +1942,216 @@ English-specific models (*.en) are optimized for English only."""
             def final_ui_reset():
                 self.is_merging = False
                 self.merge_btn.config(state="normal")
+                self.batch_merge_btn.config(state="normal")
+                self.pipeline_btn.config(state="normal")
                 self.stop_merge_btn.config(state="disabled")
-                self.merge_progress.stop()
+                self.reset_merge_progress()
+                self.merge_process = None
+            
+            self.root.after(0, final_ui_reset)
+    
+    def browse_batch_merge_folder(self, variable, title):
+        """Browse for one of the batch merge folders"""
+        directory = filedialog.askdirectory(title=title)
+        if directory:
+            variable.set(directory)
+    
+    def start_batch_merge(self):
+        """Pair the batch folders by filename stem and merge them in parallel (run in new thread)"""
+        if not self.batch_merge_videos.get():
+            messagebox.showerror("Error", "Please select a video folder")
+            return
+        if not ffmpeg_available():
+            messagebox.showerror("Error", 
+                "FFmpeg not found. Please install FFmpeg and add it to your PATH.\n\n"
+                "Download from: https://ffmpeg.org/download.html")
+            return
+        try:
+            triples, unmatched = match_pairs(self.batch_merge_videos.get(), self.batch_merge_srts.get() or None,
+                                             self.batch_merge_output.get() or None, self.merge_mode.get())
+        except OSError as e:
+            messagebox.showerror("Error", f"Cannot read batch folders: {e}")
+            return
+        for video in unmatched:
+            self.merge_log_message(f"No subtitle found for {os.path.basename(video)}, skipping")
+        if not triples:
+            messagebox.showerror("Error", "No video/subtitle pairs found (subtitles are matched by filename)")
+            return
+        
+        self.batch_merge_tree.delete(*self.batch_merge_tree.get_children())
+        for video, _, _ in triples:
+            self.batch_merge_tree.insert("", tk.END, iid=video, text=os.path.basename(video),
+                                         values=("queued", "", "", 0))
+        self.is_merging = True
+        self.merge_btn.config(state="disabled")
+        self.pipeline_btn.config(state="disabled")
+        self.batch_merge_btn.config(state="disabled")
+        self.stop_merge_btn.config(state="normal")
+        self.merge_progress.start()
+        self.status_var.set("Starting batch merge...")
+        self.merge_log_message(f"Starting batch merge of {len(triples)} videos...")
+        
+        threading.Thread(target=self._batch_merge_thread, args=(triples,), daemon=True).start()
+    
+    def update_batch_merge_view(self, jobs, totals):
+        """Refresh the per-job rows and the aggregate throughput line"""
+        for job in jobs:
+            if not self.batch_merge_tree.exists(job["video"]):
+                continue
+            progress = f"{job['percent']:.1f}%" if job["percent"] is not None else ""
+            speed = f"{job['speed']:.2f}x" if job["speed"] and job["status"] == "running" else ""
+            self.batch_merge_tree.item(job["video"], values=(job["status"], progress, speed, job["attempts"]))
+        done = sum(job["status"] == "done" for job in jobs)
+        running = sum(job["status"] == "running" for job in jobs)
+        speed = f"{totals['speed']:.2f}x realtime" if totals["speed"] else "..."
+        self.batch_merge_label.config(
+            text=f"{done}/{len(jobs)} done, {running} running | {totals['media_seconds']:.0f}s of video in "
+                 f"{format_duration(totals['wall_seconds'])} ({speed}, {totals['fps']:.0f} fps)")
+    
+    def _batch_merge_thread(self, triples):
+        try:
+            try:
+                workers = max(1, int(self.batch_merge_workers.get()))
+            except ValueError:
+                workers = DEFAULT_MERGE_WORKERS
+            try:
+                retries = max(0, int(self.batch_merge_retries.get()))
+            except ValueError:
+                retries = DEFAULT_MERGE_RETRIES
+            summary = run_merge_batch(
+                triples,
+                workers=workers,
+                retries=retries,
+                log_callback=self.merge_log_message,
+                status_callback=lambda jobs, totals: self.root.after(0, self.update_batch_merge_view, jobs, totals),
+                stop_callback=lambda: not self.is_merging,
+                **self.merge_options()
+            )
+            if not self.is_merging:
+                self.merge_log_message("⚠️ Batch merge stopped by user")
+                self.root.after(0, self.status_var.set, "Batch merge stopped by user")
+            else:
+                message = f"{summary['done']} merged, {summary['failed']} failed, {summary['skipped']} skipped"
+                self.root.after(0, self.status_var.set, f"Batch merge done: {message}")
+                self.root.after(0, messagebox.showinfo, "Batch Complete", message)
+        except Exception as e:
+            self.merge_log_message(f"❌ Error during batch merge: {e}")
+            self.root.after(0, self.status_var.set, "Batch merge error occurred. Check log for details.")
+            self.root.after(0, messagebox.showerror, "Error", f"Batch merge error: {e}")
+        finally:
+            def final_ui_reset():
+                self.is_merging = False
+                self.merge_btn.config(state="normal")
+                self.pipeline_btn.config(state="normal")
+                self.batch_merge_btn.config(state="normal")
+                self.stop_merge_btn.config(state="disabled")
+                self.reset_merge_progress()
+            
+            self.root.after(0, final_ui_reset)
+    
+    def start_pipeline(self):
+        """Run extraction, translation and burn-in for the merge video as one job"""
+        if not self.merge_video_file.get() or not os.path.exists(self.merge_video_file.get()):
+            messagebox.showerror("Error", "Please select a valid video file")
+            return
+        if not self.merge_output_file.get():
+            messagebox.showerror("Error", "Please set output file path")
+            return
+        local_path = self.local_model_path.get().strip()
+        if not local_path or not os.path.exists(local_path):
+            messagebox.showerror("Error", "Please select or download a local Whisper model first (Extraction tab)")
+            return
+        if not self.api_key.get() or not self.model_name.get():
+            messagebox.showerror("Error", "Please enter the Google API Key and Gemini model (Translation tab)")
+            return
+        if not ffmpeg_available():
+            messagebox.showerror("Error", 
+                "FFmpeg not found. Please install FFmpeg and add it to your PATH.\n\n"
+                "Download from: https://ffmpeg.org/download.html")
+            return
+        if not self.configure_translation_api():
+            return
+        
+        self.is_merging = True
+        self.merge_btn.config(state="disabled")
+        self.batch_merge_btn.config(state="disabled")
+        self.pipeline_btn.config(state="disabled")
+        self.stop_merge_btn.config(state="normal")
+        self.merge_progress.start()
+        self.status_var.set("Starting pipeline...")
+        self.merge_log_message("Starting pipeline: extract → translate → merge...")
+        
+        threading.Thread(target=self._pipeline_thread, args=(local_path,), daemon=True).start()
+    
+    def _pipeline_thread(self, local_path):
+        from subtitle_pipeline import run_pipeline
+        
+        try:
+            concurrency = max(1, int(self.translate_concurrency.get()))
+        except ValueError:
+            concurrency = DEFAULT_CONCURRENCY
+        try:
+            token_budget = max(1, int(self.batch_token_budget.get()))
+        except ValueError:
+            token_budget = None
+        
+        try:
+            segments = max(0, int(self.merge_segments.get()))
+        except ValueError:
+            segments = 1
+        
+        def keep_process(process):
+            self.merge_process = process
+        
+        cache = open_translation_cache(log_callback=self.merge_log_message) if self.use_translation_cache.get() else None
+        try:
+            result = run_pipeline(
+                self.merge_video_file.get(),
+                local_path,
+                self.target_lang.get(),
+                output_path=self.merge_output_file.get(),
+                extract_options={
+                    "device": self.whisper_device.get(),
+                    "profile": self.whisper_profile.get(),
+                    "parallel_workers": max(1, int(self.whisper_workers.get() or 1)),
+                    "threads_per_worker": max(0, int(self.whisper_threads_per_worker.get() or 0)),
+                    "low_memory": self.whisper_low_memory.get(),
+                },
+                concurrency=concurrency,
+                token_budget=token_budget,
+                cache=cache,
+                merge_options=self.merge_options(),
+                segments=segments,
+                log_callback=self.merge_log_message,
+                ffmpeg_progress_callback=lambda progress: self.root.after(0, self.update_merge_progress, progress),
+                progress_callback=lambda done, total: self.root.after(
+                    0, self.update_progress_label, f"Translated {done}/{total} cues"),
+                stop_callback=lambda: not self.is_merging,
+                process_callback=keep_process
+            )
+            if result["output"]:
+                self.root.after(0, self.update_progress_label, "✅ Pipeline completed successfully!")
+                self.root.after(0, self.status_var.set, "Pipeline completed successfully!")
+                self.root.after(0, messagebox.showinfo, "Success", f"Video saved to:\n{result['output']}")
+            else:
+                self.root.after(0, self.update_progress_label, "Pipeline stopped")
+                self.root.after(0, self.status_var.set, "Pipeline stopped by user")
+        except Exception as e:
+            self.root.after(0, self.update_progress_label, "❌ Pipeline failed.")
+            self.merge_log_message(f"❌ Error during pipeline: {e}")
+            self.root.after(0, self.status_var.set, "Pipeline error occurred. Check log for details.")
+            self.root.after(0, messagebox.showerror, "Error", f"Pipeline error: {e}")
+        finally:
+            if cache is not None:
+                cache.close()
+            
+            def final_ui_reset():
+                self.is_merging = False
+                self.merge_btn.config(state="normal")
+                self.batch_merge_btn.config(state="normal")
+                self.pipeline_btn.config(state="normal")
+                self.stop_merge_btn.config(state="disabled")
+                self.reset_merge_progress()
                 self.merge_process = None
             
             self.root.after(0, final_ui_reset)
@@ -1682,12 +2162,13 @@ English-specific models (*.en) are optimized for English only."""
         if self.merge_process and self.merge_process.poll() is None:
             self.merge_process.terminate()
             self.merge_log_message("Merge stopped by user")
-            self.merge_btn.config(state="normal")
-            self.stop_merge_btn.config(state="disabled")
-            self.merge_progress.stop()
+        # The worker thread's final_ui_reset re-enables the start buttons once it has wound down
+        self.stop_merge_btn.config(state="disabled")
         
         
 def main():
+    # Needed by the parallel transcription worker processes in the frozen exe
+    multiprocessing.freeze_support()
     root = tk.Tk()
     app = SRTTranslatorGUI(root)
     root.mainloop()
@@ -0,0 +1,141 @@
+import os
+import hashlib
+import threading
+import subprocess
+
+from parallel_transcribe import SAMPLING_RATE
+from process_utils import make_log, hidden_window_startupinfo
+
+# ========== Decoded Audio Cache ==========
+# 16 kHz mono signed 16-bit PCM, about 115 MB per hour of audio
+DEFAULT_AUDIO_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".srt_translator", "audio_cache")
+DEFAULT_MAX_CACHE_BYTES = 10 * 1024 ** 3
+AUDIO_CACHE_SUFFIX = ".s16le"
+# Bytes hashed from the start and the end of the source; hashing a whole 4K file would cost a full read
+HASH_SAMPLE_BYTES = 1024 * 1024
+
+_cache_lock = threading.Lock()
+
+
+def source_key(path):
+    """Key a media file by sampled content hash, size and mtime, so renamed copies share an entry"""
+    stat = os.stat(path)
+    digest = hashlib.sha256(f"{stat.st_size}:{stat.st_mtime_ns}".encode("ascii"))
+    with open(path, "rb") as f:
+        digest.update(f.read(HASH_SAMPLE_BYTES))
+        if stat.st_size > 2 * HASH_SAMPLE_BYTES:
+            f.seek(-HASH_SAMPLE_BYTES, os.SEEK_END)
+            digest.update(f.read(HASH_SAMPLE_BYTES))
+    return digest.hexdigest()
+
+
+def _extract_pcm(video_path, output_path):
+    cmd = [
+        "ffmpeg", "-nostdin", "-y", "-v", "error",
+        "-i", str(video_path),
+        "-vn", "-ac", "1", "-ar", str(SAMPLING_RATE),
+        "-f", "s16le", "-acodec", "pcm_s16le",
+        str(output_path)
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True, encoding="utf-8", errors="ignore",
+                            startupinfo=hidden_window_startupinfo())
+    if result.returncode != 0:
+        raise RuntimeError(f"FFmpeg audio extraction failed: {result.stderr.strip()[-500:]}")
+
+
+def _evict(cache_dir, max_bytes, keep):
+    """Delete the least recently used cached tracks until the cache fits in max_bytes"""
+    entries = []
+    for name in os.listdir(cache_dir):
+        if name.endswith(AUDIO_CACHE_SUFFIX):
+            path = os.path.join(cache_dir, name)
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if path != keep:
+            os.remove(path)
+            total -= size
+
+
+def cached_audio_path(video_path, cache_dir=DEFAULT_AUDIO_CACHE_DIR, max_bytes=DEFAULT_MAX_CACHE_BYTES, log_callback=None):
+    """Return the path of the 16 kHz mono PCM track of video_path, extracting it with FFmpeg on first use"""
+    log = make_log(log_callback)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, source_key(video_path) + AUDIO_CACHE_SUFFIX)
+    if os.path.exists(path):
+        # Touch so the entry counts as recently used
+        os.utime(path)
+        log(f"Using cached audio track: {path}")
+        return path
+
+    log("Extracting 16 kHz mono audio track (cached for later runs)...")
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        _extract_pcm(video_path, temp_path)
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    with _cache_lock:
+        _evict(cache_dir, max_bytes, keep=path)
+    return path
+
+
+def load_pcm(path, offset_seconds=0.0):
+    """Read a cached PCM track as the float32 waveform faster-whisper expects"""
+    import numpy as np
+
+    start = int(offset_seconds * SAMPLING_RATE)
+    samples = np.fromfile(path, dtype=np.int16, offset=start * 2)
+    return samples.astype(np.float32) / 32768.0
+
+
+
+# Window fed to the model at a time in low-memory mode, and how far back from its end to look for a quiet cut
+STREAM_CHUNK_SECONDS = 120
+STREAM_CUT_SEARCH_SECONDS = 5
+STREAM_CUT_FRAME_SECONDS = 0.1
+
+
+def _quietest_sample(samples):
+    """Index of the centre of the lowest-energy frame in an int16 slice"""
+    import numpy as np
+
+    frame = int(STREAM_CUT_FRAME_SECONDS * SAMPLING_RATE)
+    frames = len(samples) // frame
+    if frames < 2:
+        return len(samples)
+    energy = np.square(samples[:frames * frame].astype(np.float32)).reshape(frames, frame).sum(axis=1)
+    return int(np.argmin(energy)) * frame + frame // 2
+
+
+def iter_pcm_chunks(path, offset_seconds=0.0, chunk_seconds=STREAM_CHUNK_SECONDS):
+    """Yield (start_seconds, float32 waveform) windows of a cached PCM track read through a memory map.
+
+    Only one window is converted to float32 at a time, so resident memory stays flat
+    however long the track is. Windows are cut at the quietest frame near their end
+    to avoid splitting a word.
+    """
+    import numpy as np
+
+    if os.path.getsize(path) < 2:
+        return
+    pcm = np.memmap(path, dtype=np.int16, mode="r")
+    total = len(pcm)
+    start = int(offset_seconds * SAMPLING_RATE)
+    window = int(chunk_seconds * SAMPLING_RATE)
+    search = int(STREAM_CUT_SEARCH_SECONDS * SAMPLING_RATE)
+    try:
+        while start < total:
+            end = min(start + window, total)
+            if end < total:
+                search_start = max(start + 1, end - search)
+                end = search_start + _quietest_sample(pcm[search_start:end])
+            yield start / SAMPLING_RATE, pcm[start:end].astype(np.float32) / 32768.0
+            start = end
+    finally:
+        del pcm
@@ -0,0 +1,219 @@
+import os
+import glob
+import json
+import time
+import argparse
+import threading
+from pathlib import Path
+
+from faster_whisper_extract_srt import extract_subtitles_with_whisper, checkpoint_path_for, get_whisper_model, resolve_whisper_profile, WHISPER_PROFILES
+from process_utils import make_log
+
+VIDEO_EXTENSIONS = {".mp4", ".avi", ".mkv", ".mov", ".wmv", ".flv", ".webm"}
+QUEUE_FILE_NAME = ".subtitle_extract_queue.json"
+
+
+def collect_videos(source):
+    """Expand a directory (non-recursive) or a glob pattern into a sorted list of video files"""
+    if os.path.isdir(source):
+        paths = [os.path.join(source, name) for name in os.listdir(source)]
+    else:
+        paths = glob.glob(source, recursive=True)
+    return sorted(
+        os.path.abspath(path) for path in paths
+        if os.path.isfile(path) and Path(path).suffix.lower() in VIDEO_EXTENSIONS
+    )
+
+
+def srt_path_for(video_path, output_dir=None):
+    video = Path(video_path)
+    return str(Path(output_dir or video.parent) / f"{video.stem}.srt")
+
+
+def is_up_to_date(video_path, srt_path):
+    # A checkpoint means the SRT is the partial output of a stopped run that still has to be resumed
+    return os.path.exists(srt_path) and os.path.getmtime(srt_path) >= os.path.getmtime(video_path) \
+        and not checkpoint_path_for(srt_path).exists()
+
+
+class ExtractionJobQueue:
+    """Job list persisted as JSON so an interrupted batch picks up where it stopped.
+
+    Each job is keyed by video path and moves pending -> running -> done/failed.
+    Jobs found 'running' on load were interrupted and go back to pending.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.jobs = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.jobs = json.load(f)
+            except (OSError, ValueError):
+                self.jobs = {}
+        for job in self.jobs.values():
+            if job["status"] == "running":
+                job["status"] = "pending"
+
+    def _save(self):
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.jobs, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self.path)
+
+    def needs_run(self, video_path, output_path):
+        """A file needs work unless its SRT is newer than the video and the job finished"""
+        with self._lock:
+            job = self.jobs.get(video_path)
+        if job is not None and job["status"] != "done":
+            return True
+        return not is_up_to_date(video_path, output_path)
+
+    def add(self, video_path, output_path):
+        with self._lock:
+            self.jobs[video_path] = {"output": output_path, "status": "pending", "error": ""}
+            self._save()
+
+    def next_pending(self):
+        with self._lock:
+            for video_path, job in self.jobs.items():
+                if job["status"] == "pending":
+                    job["status"] = "running"
+                    self._save()
+                    return video_path, job["output"]
+        return None
+
+    def finish(self, video_path, status, **fields):
+        with self._lock:
+            self.jobs[video_path].update(status=status, **fields)
+            self._save()
+
+    def counts(self):
+        with self._lock:
+            counts = {}
+            for job in self.jobs.values():
+                counts[job["status"]] = counts.get(job["status"], 0) + 1
+            return counts
+
+
+def run_batch(source, local_model_path, device="cpu", compute_type=None, concurrent_files=1,
+              output_dir=None, queue_path=None, log_callback=None, stop_callback=None, profile=None, resume=True, **extract_options):
+    """Extract subtitles for every video in a folder/glob, sharing one loaded model.
+
+    Files whose SRT is already newer than the video are skipped. With `resume`, files
+    interrupted in an earlier run continue from their transcription checkpoint. Returns a summary
+    dict with file counts, total audio seconds, wall seconds and throughput.
+    """
+    log = make_log(log_callback)
+
+    videos = collect_videos(source)
+    if not videos:
+        raise FileNotFoundError(f"No video files found for: {source}")
+
+    if queue_path is None:
+        base_dir = source if os.path.isdir(source) else os.path.dirname(videos[0])
+        queue_path = os.path.join(output_dir or base_dir, QUEUE_FILE_NAME)
+    queue = ExtractionJobQueue(queue_path)
+
+    skipped = 0
+    for video in videos:
+        output_path = srt_path_for(video, output_dir)
+        if queue.needs_run(video, output_path):
+            queue.add(video, output_path)
+        else:
+            skipped += 1
+    pending = queue.counts().get("pending", 0)
+    log(f"Batch: {len(videos)} videos, {pending} to process, {skipped} already up to date")
+    if not pending:
+        return {"done": 0, "failed": 0, "skipped": skipped, "audio_seconds": 0.0, "wall_seconds": 0.0, "throughput": 0.0}
+
+    concurrent_files = max(1, int(concurrent_files))
+    # Load once up front; every file (and every concurrent thread) reuses the pooled model
+    settings = resolve_whisper_profile(profile, device, compute_type=compute_type,
+                                       cpu_threads=extract_options.get("cpu_threads"))
+    if extract_options.get("parallel_workers", 1) <= 1:
+        get_whisper_model(local_model_path, device=device, compute_type=settings["compute_type"],
+                          log_callback=log_callback, num_workers=concurrent_files,
+                          cpu_threads=settings["cpu_threads"])
+
+    totals = {"done": 0, "failed": 0, "audio_seconds": 0.0}
+    totals_lock = threading.Lock()
+    batch_start = time.perf_counter()
+
+    def worker():
+        while not (stop_callback and stop_callback()):
+            job = queue.next_pending()
+            if job is None:
+                return
+            video_path, output_path = job
+            name = os.path.basename(video_path)
+            log(f"▶ {name}")
+            stats = {}
+            try:
+                extract_subtitles_with_whisper(
+                    video_path,
+                    output_path=output_path,
+                    local_model_path=local_model_path,
+                    device=device,
+                    compute_type=compute_type,
+                    profile=profile,
+                    num_workers=concurrent_files,
+                    log_callback=log_callback,
+                    stop_callback=stop_callback,
+                    stats=stats,
+                    resume=resume,
+                    **extract_options
+                )
+            except Exception as e:
+                queue.finish(video_path, "failed", error=str(e))
+                log(f"❌ {name}: {e}")
+                with totals_lock:
+                    totals["failed"] += 1
+                continue
+
+            if stats.get("stopped"):
+                # Partial SRT and checkpoint on disk; the file continues from there next time
+                queue.finish(video_path, "pending")
+                return
+            speed = stats["audio_seconds"] / stats["wall_seconds"] if stats["wall_seconds"] else 0.0
+            queue.finish(video_path, "done", audio_seconds=stats["audio_seconds"], wall_seconds=stats["wall_seconds"])
+            with totals_lock:
+                totals["done"] += 1
+                totals["audio_seconds"] += stats["audio_seconds"]
+                elapsed = time.perf_counter() - batch_start
+                log(f"✅ {name}: {stats['audio_seconds']:.0f}s audio in {stats['wall_seconds']:.0f}s "
+                    f"({speed:.1f}x) | batch {totals['done']}/{pending} done, "
+                    f"{totals['audio_seconds'] / elapsed:.1f} audio-s per wall-s")
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrent_files)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    wall_seconds = time.perf_counter() - batch_start
+    throughput = totals["audio_seconds"] / wall_seconds if wall_seconds else 0.0
+    log(f"Batch finished: {totals['done']} done, {totals['failed']} failed, {skipped} skipped | "
+        f"{totals['audio_seconds']:.0f}s audio in {wall_seconds:.0f}s ({throughput:.1f} audio-s per wall-s)")
+    return dict(totals, skipped=skipped, wall_seconds=wall_seconds, throughput=throughput)
+
+
+# ========== Command Line Interface ==========
+def main():
+    parser = argparse.ArgumentParser(description="Extract subtitles for a folder of videos with Faster Whisper")
+    parser.add_argument("--input", required=True, help="Video folder or glob pattern, e.g. \"D:/shows/*.mkv\"")
+    parser.add_argument("--model", required=True, help="Path to the local Whisper model directory")
+    parser.add_argument("--device", default="cpu", help="cpu, cuda or auto (default: cpu)")
+    parser.add_argument("--profile", default=None, choices=list(WHISPER_PROFILES), help="Performance profile (default: accurate)")
+    parser.add_argument("--compute_type", default=None, help="CTranslate2 compute type, e.g. int8 (default: from the profile)")
+    parser.add_argument("--jobs", type=int, default=1, help="Number of files transcribed at the same time (default: 1)")
+    parser.add_argument("--output_dir", default=None, help="Folder for the SRT files (default: next to each video)")
+    parser.add_argument("--queue_file", default=None, help=f"Job queue file (default: {QUEUE_FILE_NAME} in the output folder)")
+    args = parser.parse_args()
+    run_batch(args.input, args.model, device=args.device, compute_type=args.compute_type, profile=args.profile,
+              concurrent_files=args.jobs, output_dir=args.output_dir, queue_path=args.queue_file)
+
+if __name__ == "__main__":
+    main()
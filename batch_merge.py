@@ -0,0 +1,295 @@
+import os
+import time
+import argparse
+import threading
+from pathlib import Path
+
+from batch_extract import collect_videos
+from ffmpeg_merge import build_ffmpeg_command, ffmpeg_available, probe_source_streams, SOFT_SUBTITLE_CODECS, run_ffmpeg, probe_duration, record_merge_stats, format_duration
+from process_utils import make_log
+
+# Tried in order for a video stem; "<stem>.<lang>.srt" files are matched after these
+SRT_NAME_PATTERNS = ["{stem}_translated", "{stem}"]
+OUTPUT_NAME = "{stem}_with_subtitles{extension}"
+DEFAULT_MERGE_WORKERS = 2
+DEFAULT_MERGE_RETRIES = 1
+
+
+def output_extension(video_path, mode="burn"):
+    """Burn-in writes MP4; mux keeps the source container when it can hold soft subtitles, else MKV"""
+    if mode != "mux":
+        return ".mp4"
+    extension = Path(video_path).suffix.lower()
+    return extension if extension in SOFT_SUBTITLE_CODECS else ".mkv"
+
+
+def match_pairs(video_source, srt_dir=None, output_dir=None, mode="burn"):
+    """Pair each video with an SRT by filename stem.
+
+    `video_source` is a folder or glob pattern as in batch_extract; SRTs are looked up in
+    `srt_dir` (default: next to each video). Returns ([(video, srt, output)], [unmatched videos]).
+    """
+    videos = collect_videos(video_source)
+    srt_index = {}
+    for directory in {srt_dir} if srt_dir else {os.path.dirname(video) for video in videos}:
+        for name in os.listdir(directory):
+            if name.lower().endswith(".srt"):
+                srt_index.setdefault(Path(name).stem.lower(), os.path.join(directory, name))
+
+    pairs, unmatched = [], []
+    for video in videos:
+        stem = Path(video).stem
+        candidates = [pattern.format(stem=stem).lower() for pattern in SRT_NAME_PATTERNS]
+        candidates += sorted(key for key in srt_index if key.startswith(stem.lower() + "."))
+        srt_path = next((srt_index[key] for key in candidates if key in srt_index), None)
+        if srt_path is None:
+            unmatched.append(video)
+            continue
+        output = os.path.join(output_dir or os.path.dirname(video), OUTPUT_NAME.format(stem=stem, extension=output_extension(video, mode)))
+        pairs.append((video, os.path.abspath(srt_path), os.path.abspath(output)))
+    return pairs, unmatched
+
+
+def is_up_to_date(video_path, srt_path, output_path):
+    return os.path.exists(output_path) and \
+        os.path.getmtime(output_path) >= max(os.path.getmtime(video_path), os.path.getmtime(srt_path))
+
+
+class MergeJobQueue:
+    """Merge jobs and their live state, shared by the worker threads and the status view.
+
+    Each job moves pending -> running -> done/failed; a failed job goes back to the end of
+    the queue until it has used `retries` extra attempts. `snapshot()` returns copies safe
+    to hand to another thread.
+    """
+
+    def __init__(self, triples, retries=DEFAULT_MERGE_RETRIES):
+        self.retries = max(0, int(retries))
+        self._lock = threading.Lock()
+        self.jobs = [{"video": video, "srt": srt_path, "output": output, "status": "pending", "attempts": 0,
+                      "percent": None, "speed": None, "fps": None, "out_seconds": 0.0, "duration": None,
+                      "wall_seconds": None, "error": ""}
+                     for video, srt_path, output in triples]
+        self._order = list(range(len(self.jobs)))
+
+    def next_pending(self):
+        """Claim the next pending job, or None when nothing is left to start"""
+        with self._lock:
+            for position, index in enumerate(self._order):
+                job = self.jobs[index]
+                if job["status"] == "pending":
+                    del self._order[position]
+                    job.update(status="running", attempts=job["attempts"] + 1, percent=0.0, out_seconds=0.0, error="")
+                    return index, dict(job)
+        return None
+
+    def update(self, index, **fields):
+        with self._lock:
+            self.jobs[index].update(fields)
+
+    def finish(self, index, returncode, error=""):
+        """Record a job's outcome; returns its new status ("done", "pending" for a retry, "failed" or "stopped")"""
+        with self._lock:
+            job = self.jobs[index]
+            if returncode == 0:
+                job.update(status="done", percent=100.0)
+            elif returncode is None:
+                job.update(status="stopped")
+            elif job["attempts"] <= self.retries:
+                job.update(status="pending", error=error)
+                self._order.append(index)
+            else:
+                job.update(status="failed", error=error)
+            return job["status"]
+
+    def snapshot(self):
+        with self._lock:
+            return [dict(job) for job in self.jobs]
+
+    def counts(self):
+        with self._lock:
+            counts = {}
+            for job in self.jobs:
+                counts[job["status"]] = counts.get(job["status"], 0) + 1
+            return counts
+
+
+def throughput(jobs, wall_seconds):
+    """Aggregate batch progress: media seconds encoded per wall second and the combined encode fps"""
+    encoded = sum(job["out_seconds"] or 0.0 for job in jobs)
+    fps = sum(job["fps"] or 0.0 for job in jobs if job["status"] == "running")
+    return {"media_seconds": encoded, "speed": encoded / wall_seconds if wall_seconds else None, "fps": fps,
+            "wall_seconds": wall_seconds}
+
+
+def format_job_status(job):
+    name = os.path.basename(job["video"])
+    if job["status"] == "running":
+        percent = f"{job['percent']:.1f}%" if job["percent"] is not None else "..."
+        speed = f" {job['speed']:.2f}x" if job["speed"] else ""
+        return f"{name}: running {percent}{speed} (attempt {job['attempts']})"
+    if job["status"] == "done" and job["wall_seconds"]:
+        return f"{name}: done in {format_duration(job['wall_seconds'])}"
+    if job["error"]:
+        return f"{name}: {job['status']} ({job['error']})"
+    return f"{name}: {job['status']}"
+
+
+def run_merge_batch(triples, workers=DEFAULT_MERGE_WORKERS, retries=DEFAULT_MERGE_RETRIES, skip_existing=True,
+                    log_callback=None, status_callback=None, stop_callback=None, **options):
+    """Merge many (video, srt, output) triples with `workers` FFmpeg processes at a time.
+
+    `options` are the build_ffmpeg_command keywords; unless `threads` is set, the CPU
+    cores are shared between the workers. Outputs newer than both inputs are skipped
+    when `skip_existing`. `status_callback(jobs, totals)` receives a snapshot of every
+    job and the aggregate throughput whenever a job's state or progress changes.
+    Returns a summary dict with job counts, media seconds, wall seconds and throughput.
+    """
+    log = make_log(log_callback)
+
+    skipped = 0
+    if skip_existing:
+        pending = [triple for triple in triples if not is_up_to_date(*triple)]
+        skipped = len(triples) - len(pending)
+        triples = pending
+    queue = MergeJobQueue(triples, retries)
+    workers = max(1, min(int(workers), len(triples) or 1))
+    if not options.get("threads") and options.get("mode", "burn") == "burn":
+        options["threads"] = max(1, (os.cpu_count() or 1) // workers)
+    log(f"Merge batch: {len(triples)} jobs, {skipped} already up to date, {workers} workers, up to {retries} retries")
+
+    batch_start = time.perf_counter()
+    last_status = [0.0]
+
+    def report(force=False):
+        if not status_callback:
+            return
+        # Progress lines arrive several times a second per worker; the view needs far fewer
+        now = time.perf_counter()
+        if not force and now - last_status[0] < 0.5:
+            return
+        last_status[0] = now
+        jobs = queue.snapshot()
+        status_callback(jobs, throughput(jobs, now - batch_start))
+
+    def log_ffmpeg_error(name, line):
+        # Several encoders interleave their stderr; only errors are worth showing per job
+        if "error" in line.lower():
+            log(f"[{name}] {line}")
+
+    def on_progress(index, progress):
+        queue.update(index, percent=progress["percent"], speed=progress["speed"], fps=progress["fps"],
+                     out_seconds=progress["out_seconds"] or 0.0)
+        report()
+
+    def worker():
+        while not (stop_callback and stop_callback()):
+            claimed = queue.next_pending()
+            if claimed is None:
+                # A running job may still fail and come back for a retry
+                if queue.counts().get("running"):
+                    time.sleep(0.5)
+                    continue
+                return
+            index, job = claimed
+            name = os.path.basename(job["video"])
+            log(f"▶ {name} (attempt {job['attempts']})")
+            report(force=True)
+            stats = {}
+            error = ""
+            try:
+                os.makedirs(os.path.dirname(job["output"]), exist_ok=True)
+                duration = probe_duration(job["video"])
+                queue.update(index, duration=duration)
+                cmd = build_ffmpeg_command(job["video"], job["srt"], job["output"],
+                                           **probe_source_streams(job["video"], options))
+                returncode = run_ffmpeg(
+                    cmd,
+                    log_callback=lambda line: log_ffmpeg_error(name, line),
+                    progress_callback=lambda progress: on_progress(index, progress),
+                    stop_callback=stop_callback,
+                    duration=duration,
+                    stats=stats
+                )
+                if returncode is not None:
+                    record_merge_stats(cmd, stats)
+                if returncode:
+                    error = f"FFmpeg return code {returncode}"
+            except Exception as e:
+                returncode, error = -1, str(e)
+
+            if returncode == 0:
+                queue.update(index, wall_seconds=stats.get("wall_seconds"), out_seconds=stats.get("duration") or duration or 0.0)
+            status = queue.finish(index, returncode, error)
+            if status == "done":
+                log(f"✅ {name} done in {format_duration(stats['wall_seconds'])}")
+            elif status == "pending":
+                log(f"⚠️ {name} failed ({error}), queued for retry")
+            elif status == "failed":
+                log(f"❌ {name} failed after {job['attempts']} attempts: {error}")
+            report(force=True)
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    wall_seconds = time.perf_counter() - batch_start
+    jobs = queue.snapshot()
+    totals = throughput([job for job in jobs if job["status"] == "done"], wall_seconds)
+    counts = queue.counts()
+    summary = {"done": counts.get("done", 0), "failed": counts.get("failed", 0),
+               "stopped": counts.get("stopped", 0) + counts.get("pending", 0), "skipped": skipped,
+               "media_seconds": totals["media_seconds"], "wall_seconds": wall_seconds,
+               "throughput": totals["speed"] or 0.0, "jobs": jobs}
+    if status_callback:
+        status_callback(jobs, throughput(jobs, wall_seconds))
+    log(f"Merge batch finished: {summary['done']} done, {summary['failed']} failed, {skipped} skipped | "
+        f"{summary['media_seconds']:.0f}s of video in {wall_seconds:.0f}s ({summary['throughput']:.2f}x realtime)")
+    return summary
+
+
+# ========== Command Line Interface ==========
+def main():
+    from subtitle_cli import add_merge_options, merge_options
+
+    parser = argparse.ArgumentParser(description="Burn or mux subtitles into a folder of videos, several at a time")
+    parser.add_argument("--videos", required=True, help="Video folder or glob pattern, e.g. \"D:/shows/*.mkv\"")
+    parser.add_argument("--srts", default=None, help="Folder of SRT files matched by filename stem (default: next to each video)")
+    parser.add_argument("--output_dir", default=None, help="Folder for the merged videos (default: next to each video)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_MERGE_WORKERS,
+                        help=f"FFmpeg processes run at the same time (default: {DEFAULT_MERGE_WORKERS})")
+    parser.add_argument("--retries", type=int, default=DEFAULT_MERGE_RETRIES,
+                        help=f"Extra attempts for a failed job (default: {DEFAULT_MERGE_RETRIES})")
+    parser.add_argument("--force", action="store_true", help="Merge again even if the output is newer than its inputs")
+    add_merge_options(parser)
+    args = parser.parse_args()
+    if args.segments != 1:
+        parser.error("--segments does not apply to batch merges; use --workers to run videos in parallel")
+    if not ffmpeg_available():
+        raise SystemExit("error: FFmpeg not found. Please install FFmpeg and add it to your PATH.")
+
+    triples, unmatched = match_pairs(args.videos, args.srts, args.output_dir, args.mode)
+    for video in unmatched:
+        print(f"No SRT found for {os.path.basename(video)}, skipping")
+    if not triples:
+        raise SystemExit("error: no video/SRT pairs found")
+
+    def print_status(jobs, totals):
+        running = [format_job_status(job) for job in jobs if job["status"] == "running"]
+        done = sum(job["status"] == "done" for job in jobs)
+        speed = f"{totals['speed']:.2f}x" if totals["speed"] else "..."
+        line = f"[{done}/{len(jobs)} done, {speed}, {totals['fps']:.0f} fps] " + " | ".join(running)
+        print(f"{line[:160]:<160}", end="\r", flush=True)
+
+    summary = run_merge_batch(triples, workers=args.workers, retries=args.retries, skip_existing=not args.force,
+                              status_callback=print_status, **merge_options(args))
+    print()
+    for job in summary["jobs"]:
+        print(format_job_status(job))
+    if summary["failed"]:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import threading
+from collections import deque
+
+from rate_limiter import estimate_tokens, normalize_model_name
+
+# ========== Per-Model Batch Budgets ==========
+# Source tokens packed into one request; the reply is roughly the same size again
+MODEL_BATCH_TOKEN_BUDGETS = {
+    "gemini-2.5-flash": 2000,
+    "gemini-2.5-pro": 2000,
+    "gemini-1.5-flash": 1500,
+    "gemini-1.5-pro": 1500,
+}
+DEFAULT_BATCH_TOKEN_BUDGET = 1500
+
+INITIAL_BATCH_CUES = 10
+MAX_BATCH_CUES = 80
+# Clean responses in a row before the batch cap is raised
+GROW_AFTER_CLEAN = 2
+
+# Returned by next_batch() while an open planner waits for more items to fill a batch
+BATCH_NOT_READY = object()
+
+
+def batch_token_budget(model_name):
+    return MODEL_BATCH_TOKEN_BUDGETS.get(normalize_model_name(model_name), DEFAULT_BATCH_TOKEN_BUDGET)
+
+
+class BatchPlanner:
+    """Packs cues into batches under a token budget and adapts the cue cap to response quality.
+
+    Batches are planned lazily so the cap learned from earlier responses applies to
+    later batches. A batch with missing cues halves the cap, once for all the batches
+    planned under the same cap; clean batches grow it.
+    A planner created with closed=False accepts more items through add() and only
+    hands out full batches until close() is called.
+    """
+
+    def __init__(self, items, token_budget=DEFAULT_BATCH_TOKEN_BUDGET, initial_cues=INITIAL_BATCH_CUES,
+                 max_cues=MAX_BATCH_CUES, text_of=str, closed=True):
+        self.token_budget = max(1, int(token_budget))
+        self.max_cues = max(1, int(max_cues))
+        self.cue_cap = max(1, min(int(initial_cues), self.max_cues))
+        self.text_of = text_of
+        self.total = len(items)
+        self._queue = deque(items)
+        self._clean_streak = 0
+        # Cue cap each batch in flight was planned under, by id(batch)
+        self._planned_caps = {}
+        self._closed = closed
+        self._lock = threading.Lock()
+
+    def add(self, items):
+        """Queue more items on an open planner"""
+        with self._lock:
+            self.total += len(items)
+            self._queue.extend(items)
+
+    def close(self):
+        """No more items will be added; the remaining ones go out even as a short batch"""
+        with self._lock:
+            self._closed = True
+
+    def next_batch(self):
+        """Return the next list of items to translate, None if nothing is left,
+        or BATCH_NOT_READY if an open planner is still waiting for a full batch"""
+        with self._lock:
+            if not self._queue:
+                return None if self._closed else BATCH_NOT_READY
+            batch = []
+            tokens = 0
+            full = False
+            for item in self._queue:
+                cost = estimate_tokens(self.text_of(item))
+                # Always take at least one cue, even if it alone exceeds the budget
+                if batch and tokens + cost > self.token_budget:
+                    full = True
+                    break
+                batch.append(item)
+                tokens += cost
+                if len(batch) >= self.cue_cap:
+                    full = True
+                    break
+            if not full and not self._closed:
+                return BATCH_NOT_READY
+            for _ in batch:
+                self._queue.popleft()
+            self._planned_caps[id(batch)] = self.cue_cap
+            return batch
+
+    def report(self, batch, aligned):
+        """Feed back whether every cue of a batch came back valid"""
+        with self._lock:
+            planned_cap = self._planned_caps.pop(id(batch), self.cue_cap)
+            if aligned:
+                self._clean_streak += 1
+                if self._clean_streak >= GROW_AFTER_CLEAN:
+                    self.cue_cap = min(self.max_cues, self.cue_cap + max(1, self.cue_cap // 2))
+                    self._clean_streak = 0
+            else:
+                self._clean_streak = 0
+                # Batches planned before the cap last shrank were already accounted for
+                if planned_cap == self.cue_cap:
+                    self.cue_cap = max(1, min(self.cue_cap, len(batch)) // 2)
+
+    def requeue(self, items):
+        """Put items back at the front of the queue, in order, to be sent again"""
+        with self._lock:
+            self._queue.extendleft(reversed(items))
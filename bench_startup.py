@@ -0,0 +1,79 @@
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+# Modules that must not be imported until the user starts an action that needs them
+HEAVY_MODULES = ["google.generativeai", "faster_whisper", "ctranslate2", "srt", "requests"]
+
+# Run in a fresh interpreter so nothing is already imported
+IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+WINDOW_PROBE = """
+import json, time
+start = time.perf_counter()
+import tkinter as tk
+import app
+root = tk.Tk()
+gui = app.SRTTranslatorGUI(root, warm_up=False)
+root.update()
+elapsed = time.perf_counter() - start
+root.destroy()
+print(json.dumps({"seconds": elapsed}))
+"""
+
+
+def run_probe(code):
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "probe failed")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def measure(code, runs):
+    samples = [run_probe(code) for _ in range(runs)]
+    return statistics.median(sample["seconds"] for sample in samples), samples[-1]
+
+
+# ========== Command Line Interface ==========
+def main():
+    parser = argparse.ArgumentParser(description="Measure GUI/CLI startup time and fail on regressions")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per measurement (default: 5)")
+    parser.add_argument("--max-import-ms", type=float, default=500, help="Fail if importing app takes longer (default: 500)")
+    parser.add_argument("--max-window-ms", type=float, default=1500, help="Fail if the first window paint takes longer (default: 1500)")
+    args = parser.parse_args()
+
+    failures = []
+    for module in ["app", "subtitle_cli"]:
+        seconds, sample = measure(IMPORT_PROBE.format(module=module, heavy=HEAVY_MODULES), args.runs)
+        print(f"import {module}: {seconds * 1000:.0f} ms (median of {args.runs})")
+        if sample["heavy"]:
+            failures.append(f"import {module} loaded heavy modules: {', '.join(sample['heavy'])}")
+        if module == "app" and seconds * 1000 > args.max_import_ms:
+            failures.append(f"import app took {seconds * 1000:.0f} ms (limit {args.max_import_ms:.0f} ms)")
+
+    try:
+        seconds, _ = measure(WINDOW_PROBE, args.runs)
+    except RuntimeError as e:
+        # No display (e.g. CI without X); import timings above still guard the heavy part
+        print(f"window: skipped ({e})")
+    else:
+        print(f"window shown: {seconds * 1000:.0f} ms (median of {args.runs})")
+        if seconds * 1000 > args.max_window_ms:
+            failures.append(f"first window paint took {seconds * 1000:.0f} ms (limit {args.max_window_ms:.0f} ms)")
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
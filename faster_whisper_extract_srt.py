@@ -1,11 +1,160 @@
 import os
+import gc
+import sys
+import json
+import time
+import ctypes
+import shutil
 import tempfile
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from faster_whisper import WhisperModel
 import traceback
+from parallel_transcribe import transcribe_parallel, TranscribedSegment, SAMPLING_RATE
+from audio_cache import cached_audio_path, load_pcm, iter_pcm_chunks
+from ffmpeg_merge import ffmpeg_available
+from process_utils import console_log
 
+# ========== Performance Profiles ==========
+# compute_type per device family; cpu_threads 0 lets CTranslate2 pick
+WHISPER_PROFILES = {
+    "fastest": {"compute_type": {"cpu": "int8", "cuda": "int8_float16"}, "beam_size": 1, "vad_filter": True, "cpu_threads": 0},
+    "balanced": {"compute_type": {"cpu": "int8", "cuda": "float16"}, "beam_size": 3, "vad_filter": True, "cpu_threads": 0},
+    "accurate": {"compute_type": {"cpu": "default", "cuda": "default"}, "beam_size": 5, "vad_filter": False, "cpu_threads": 0},
+}
+# Matches the settings extraction used before profiles existed
+DEFAULT_PROFILE = "accurate"
 
 
+def resolve_whisper_profile(profile=None, device="cpu", **overrides):
+    """Return the concrete knobs of a profile for a device; non-None overrides win"""
+    name = profile or DEFAULT_PROFILE
+    if name not in WHISPER_PROFILES:
+        raise ValueError(f"Unknown performance profile: {name}")
+    preset = WHISPER_PROFILES[name]
+    family = device
+    if device == "auto":
+        try:
+            import ctranslate2
+            family = "cuda" if ctranslate2.get_cuda_device_count() > 0 else "cpu"
+        except Exception:
+            family = "cpu"
+    settings = {
+        "profile": name,
+        "compute_type": preset["compute_type"].get(family, "default"),
+        "beam_size": preset["beam_size"],
+        "vad_filter": preset["vad_filter"],
+        "cpu_threads": preset["cpu_threads"],
+    }
+    settings.update({key: value for key, value in overrides.items() if value is not None})
+    return settings
+
+
+def describe_profile(settings):
+    return (f"{settings['profile']} (compute_type={settings['compute_type']}, beam_size={settings['beam_size']}, "
+            f"vad_filter={settings['vad_filter']}, cpu_threads={settings['cpu_threads'] or 'auto'})")
+
+# ========== Model Pool ==========
+# Warm models kept per (path, device, compute_type); least recently used ones are evicted first
+MAX_CACHED_MODELS = 2
+MAX_CACHED_MODEL_BYTES = 8 * 1024 ** 3
+
+_model_pool = OrderedDict()
+_model_pool_lock = threading.Lock()
+# Keys being loaded right now, so other callers wait for that load instead of starting their own
+_models_loading = {}
+
+
+def _model_size_bytes(model_path):
+    """Approximate a model's memory footprint by its weights on disk"""
+    path = Path(model_path)
+    if path.is_file():
+        return path.stat().st_size
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+def get_whisper_model(model_path, device="cpu", compute_type="default", log_callback=None, num_workers=1, cpu_threads=0):
+    """Return a warm WhisperModel from the pool, loading it on first use.
+
+    num_workers > 1 lets that many threads call transcribe() on the model at once.
+    """
+    key = (str(Path(model_path).resolve()), device, compute_type, num_workers, cpu_threads)
+    while True:
+        with _model_pool_lock:
+            entry = _model_pool.get(key)
+            if entry is not None:
+                _model_pool.move_to_end(key)
+                message = f"Reusing loaded model (saved ~{entry['load_time']:.1f}s of loading)"
+                console_log(message, log_callback)
+                return entry["model"]
+            loading = _models_loading.get(key)
+            if loading is None:
+                # Reserve the key; the load itself runs without the lock held
+                loading = _models_loading[key] = threading.Event()
+                break
+        # Another thread is loading this model; use its result (or retry if that load failed)
+        loading.wait()
+
+    try:
+        # Imported here so the GUI and CLI start without loading ctranslate2
+        from faster_whisper import WhisperModel
+
+        start = time.perf_counter()
+        model = WhisperModel(model_path, device=device, compute_type=compute_type,
+                             num_workers=num_workers, cpu_threads=cpu_threads)
+        load_time = time.perf_counter() - start
+        size = _model_size_bytes(model_path)
+        with _model_pool_lock:
+            _model_pool[key] = {"model": model, "load_time": load_time, "size": size}
+            _enforce_pool_limits(keep=key)
+    finally:
+        with _model_pool_lock:
+            del _models_loading[key]
+        loading.set()
+    message = f"Model loaded in {load_time:.1f}s"
+    console_log(message, log_callback)
+    return model
+
+
+def _enforce_pool_limits(keep=None):
+    evicted = False
+    while len(_model_pool) > 1:
+        total = sum(entry["size"] for entry in _model_pool.values())
+        if len(_model_pool) <= MAX_CACHED_MODELS and total <= MAX_CACHED_MODEL_BYTES:
+            break
+        oldest = next(iter(_model_pool))
+        if oldest == keep:
+            break
+        del _model_pool[oldest]
+        evicted = True
+    if evicted:
+        gc.collect()
+
+
+def evict_whisper_models(model_path=None):
+    """Drop pooled models (all of them, or only those loaded from model_path); returns how many"""
+    with _model_pool_lock:
+        if model_path is None:
+            keys = list(_model_pool)
+        else:
+            resolved = str(Path(model_path).resolve())
+            keys = [key for key in _model_pool if key[0] == resolved]
+        for key in keys:
+            del _model_pool[key]
+    if keys:
+        gc.collect()
+    return len(keys)
+
+
+def set_model_pool_limits(max_models=None, max_bytes=None):
+    global MAX_CACHED_MODELS, MAX_CACHED_MODEL_BYTES
+    with _model_pool_lock:
+        if max_models is not None:
+            MAX_CACHED_MODELS = max(1, int(max_models))
+        if max_bytes is not None:
+            MAX_CACHED_MODEL_BYTES = int(max_bytes)
+        _enforce_pool_limits()
+
 def format_timestamp(seconds):
     hours = int(seconds // 3600)
     minutes = int((seconds % 3600) // 60)
@@ -14,7 +163,198 @@ def format_timestamp(seconds):
     seconds = int(seconds)
     return f"{hours:02d}:{minutes:02d}:{seconds:02d},{milliseconds:03d}"
 
-def extract_subtitles_with_whisper(video_path, output_path=None, local_model_path="", device="cpu", log_callback=None, stop_callback=None):
+def checkpoint_path_for(output_path):
+    """Checkpoint file of an interrupted extraction into output_path"""
+    output_path = Path(output_path)
+    return output_path.with_name(output_path.name + ".checkpoint.json")
+
+
+class StreamingSrtWriter:
+    """Appends cues to `<output>.part` as they arrive and renames it over the output on commit.
+
+    The part file is fsynced every `fsync_every` cues, and after every sync a checkpoint
+    (`<output>.checkpoint.json`) records the cue count, the end time of the last cue and
+    the part file length, so a crash loses at most that many cues. With `resume`, a
+    valid checkpoint for `source` is picked up: the part file is cut back to the
+    checkpointed length and new cues are appended after it.
+    """
+
+    def __init__(self, output_path, fsync_every=25, source=None, resume=False):
+        self.output_path = Path(output_path)
+        self.temp_path = self.output_path.with_name(self.output_path.name + ".part")
+        self.checkpoint_path = checkpoint_path_for(self.output_path)
+        self.fsync_every = fsync_every
+        self.source = source
+        self.count = 0
+        self.last_end = 0.0
+        self.language = None
+        checkpoint = self.load_checkpoint() if resume else None
+        if checkpoint:
+            self.count = checkpoint["count"]
+            self.last_end = checkpoint["last_end"]
+            self.language = checkpoint.get("language")
+            self._file = open(self.temp_path, "r+", encoding="utf-8")
+            self._file.seek(checkpoint["bytes"])
+            self._file.truncate()
+        else:
+            self._file = open(self.temp_path, "w", encoding="utf-8")
+            self._remove_checkpoint()
+        self.resumed = checkpoint is not None
+
+    def _source_signature(self):
+        if self.source is None:
+            return None
+        stat = os.stat(self.source)
+        return {"path": os.path.abspath(self.source), "size": stat.st_size, "mtime": stat.st_mtime}
+
+    def load_checkpoint(self):
+        """Return the checkpoint if it belongs to the same source file and part file, else None"""
+        try:
+            with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if checkpoint.get("source") != self._source_signature():
+            return None
+        if not self.temp_path.exists() or self.temp_path.stat().st_size < checkpoint.get("bytes", 0):
+            return None
+        if not checkpoint.get("count"):
+            return None
+        return checkpoint
+
+    def write(self, start, end, text):
+        self.count += 1
+        self.last_end = end
+        self._file.write(f"{self.count}\n{format_timestamp(start)} --> {format_timestamp(end)}\n{text}\n\n")
+        if self.count % self.fsync_every == 0:
+            self.sync()
+        return self.count
+
+    def sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        checkpoint = {"source": self._source_signature(), "count": self.count, "last_end": self.last_end,
+                      "bytes": self._file.tell(), "language": self.language}
+        temp_path = str(self.checkpoint_path) + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(checkpoint, f)
+        os.replace(temp_path, self.checkpoint_path)
+
+    def _remove_checkpoint(self):
+        if self.checkpoint_path.exists():
+            self.checkpoint_path.unlink()
+
+    def commit(self, keep_checkpoint=False):
+        """Make the written cues visible at output_path in one atomic step.
+
+        With `keep_checkpoint`, the part file and checkpoint stay behind (the output is
+        a copy) so a stopped run can be resumed later.
+        """
+        self.close()
+        if keep_checkpoint:
+            temp_output = self.output_path.with_name(self.output_path.name + ".tmp")
+            shutil.copyfile(self.temp_path, temp_output)
+            os.replace(temp_output, self.output_path)
+            return
+        os.replace(self.temp_path, self.output_path)
+        self._remove_checkpoint()
+
+    def discard(self):
+        self._file.close()
+        if self.temp_path.exists():
+            self.temp_path.unlink()
+        self._remove_checkpoint()
+
+    def close(self):
+        """Close without committing; whatever was synced stays in the part file"""
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
+
+
+class _OffsetSegments:
+    """Shifts the timestamps of segments transcribed from a cut of the audio back onto the full timeline"""
+
+    def __init__(self, segments, offset):
+        self.segments = segments
+        self.offset = offset
+
+    def __iter__(self):
+        for segment in self.segments:
+            yield TranscribedSegment(self.offset + segment.start, self.offset + segment.end, segment.text)
+
+    def close(self):
+        if hasattr(self.segments, "close"):
+            self.segments.close()
+
+def _transcribe_streamed(model, chunks, language, transcribe_options, info):
+    """Transcribe (start_seconds, waveform) windows one after another, yielding segments on the full timeline.
+
+    The language detected on the first window is reused for the rest.
+    """
+    for start, audio in chunks:
+        segments, chunk_info = model.transcribe(audio, language=language, **transcribe_options)
+        if language is None:
+            language = chunk_info.language
+            info["language"] = language
+        for segment in segments:
+            yield TranscribedSegment(start + segment.start, start + segment.end, segment.text)
+
+
+class _ProcessMemoryCounters(ctypes.Structure):
+    _fields_ = [("cb", ctypes.c_ulong), ("PageFaultCount", ctypes.c_ulong),
+                ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+
+def peak_rss_bytes():
+    """Peak resident memory of the whole process since it started, or None where it cannot be measured.
+
+    This is a process-lifetime high-water mark: in a GUI or batch session a later job
+    reports the peak of the largest job so far, not its own.
+    """
+    if os.name == "nt":
+        counters = _ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        kernel32 = ctypes.WinDLL("kernel32")
+        psapi = ctypes.WinDLL("psapi")
+        psapi.GetProcessMemoryInfo.argtypes = [ctypes.c_void_p, ctypes.POINTER(_ProcessMemoryCounters), ctypes.c_ulong]
+        kernel32.GetCurrentProcess.restype = ctypes.c_void_p
+        if psapi.GetProcessMemoryInfo(kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb):
+            return counters.PeakWorkingSetSize
+        return None
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+def extract_subtitles_with_whisper(video_path, output_path=None, local_model_path="", device="cpu", log_callback=None, stop_callback=None, compute_type=None, parallel_workers=1, threads_per_worker=0, num_workers=1, stats=None,
+                                   profile=None, beam_size=None, vad_filter=None, cpu_threads=None, segment_callback=None, resume=False, audio_cache=True, low_memory=False):
+    """Transcribe a video into an SRT file and return its path.
+
+    `profile` picks a preset from WHISPER_PROFILES ("fastest", "balanced", "accurate");
+    compute_type, beam_size, vad_filter and cpu_threads override single knobs of it.
+    If a `stats` dict is given it is filled with audio_seconds, wall_seconds,
+    segments, stopped and the resolved settings for throughput reporting.
+    segment_callback(index, start, end, text) sees every cue as soon as it is written.
+    With `resume`, a run that was stopped or crashed continues from its last checkpoint:
+    decoding starts at the end of the last saved cue and new cues are appended.
+    With `audio_cache`, the audio track is demuxed once with FFmpeg into a 16 kHz mono
+    PCM file (see audio_cache) and later runs on the same file skip the video decode.
+    `low_memory` feeds that file to a sequential transcription window by window through
+    a memory map, so peak memory does not grow with the length of the audio.
+    """
+    start_time = time.perf_counter()
+    peak_rss_before = peak_rss_bytes()
+    settings = resolve_whisper_profile(profile, device, compute_type=compute_type, beam_size=beam_size,
+                                       vad_filter=vad_filter, cpu_threads=cpu_threads)
+    compute_type = settings["compute_type"]
+    transcribe_options = {"beam_size": settings["beam_size"], "vad_filter": settings["vad_filter"]}
     if not Path(video_path).exists():
         raise FileNotFoundError(f"Video file not found: {video_path}")
 
@@ -24,15 +364,20 @@ def extract_subtitles_with_whisper(video_path, output_path=None, local_model_pat
 
     try:
         if local_model_path and Path(local_model_path).exists():
-            print(f"Using local model: {local_model_path} on device: {device}")
+            print(f"Using local model: {local_model_path} on device: {device}, profile: {describe_profile(settings)}")
             if log_callback:
-                log_callback(f"Using local model: {local_model_path} on device: {device}")
-            model = WhisperModel(local_model_path, device=device)
+                log_callback(f"Using local model: {local_model_path} on device: {device}, profile: {describe_profile(settings)}")
+            # In parallel mode every worker process loads its own copy of the model
+            if parallel_workers <= 1:
+                model = get_whisper_model(local_model_path, device=device, compute_type=compute_type,
+                                          log_callback=log_callback, num_workers=num_workers,
+                                          cpu_threads=settings["cpu_threads"])
         else:
             if local_model_path:
                 print(f"Local model path not found")
             if log_callback:
                 log_callback(f"Local model path not found")
+            raise FileNotFoundError(f"Local model path not found: {local_model_path}")
 
     except Exception as e:
         print(f"Model loading error: {e}")
@@ -44,47 +389,127 @@ def extract_subtitles_with_whisper(video_path, output_path=None, local_model_pat
     if log_callback:
         log_callback("Model prepared, starting transcription...")
     
+    writer = StreamingSrtWriter(output_path, source=video_path, resume=resume)
+    audio = video_path
+    offset = 0.0
+    if writer.resumed:
+        offset = writer.last_end
+        message = f"Resuming after cue {writer.count} at {format_timestamp(offset)}"
+        console_log(message, log_callback)
+
+    audio_info = {}
     try:
-        segments, info = model.transcribe(video_path, language=None)
+        pcm_path = None
+        if audio_cache and ffmpeg_available():
+            try:
+                pcm_path = cached_audio_path(video_path, log_callback=log_callback)
+            except (RuntimeError, OSError) as e:
+                console_log(f"Audio cache unavailable, decoding the video directly: {e}", log_callback)
+        streamed = bool(low_memory and pcm_path) and parallel_workers <= 1
+        if low_memory and not streamed:
+            message = "Low-memory mode needs FFmpeg for the audio cache and a single worker, loading the whole track"
+            console_log(message, log_callback)
+        if pcm_path and not streamed:
+            audio = load_pcm(pcm_path, offset)
+        elif offset and not pcm_path:
+            from faster_whisper import decode_audio
+            audio = decode_audio(str(video_path), sampling_rate=SAMPLING_RATE)[int(offset * SAMPLING_RATE):]
+        if streamed:
+            segments = _transcribe_streamed(model, iter_pcm_chunks(pcm_path, offset), writer.language,
+                                            transcribe_options, audio_info)
+            audio_info["duration"] = os.path.getsize(pcm_path) / 2 / SAMPLING_RATE - offset
+        elif parallel_workers > 1:
+            segments = transcribe_parallel(
+                audio, local_model_path,
+                workers=parallel_workers,
+                threads_per_worker=threads_per_worker,
+                device=device,
+                compute_type=compute_type,
+                transcribe_options=transcribe_options,
+                language=writer.language,
+                log_callback=log_callback,
+                info=audio_info
+            )
+        else:
+            segments, info = model.transcribe(audio, language=writer.language, **transcribe_options)
+            audio_info["duration"] = info.duration
+            writer.language = info.language
+        if offset and not streamed:
+            # Durations and throughput below cover only the audio decoded in this run
+            segments = _OffsetSegments(segments, offset)
     except Exception as e:
         print(f"Transcription failed: {e}")
         traceback.print_exc()
         if log_callback:
             log_callback(f"Transcription failed: {e}")
+        if writer.resumed:
+            writer.close()
+        else:
+            writer.discard()
+        raise
     
-    srt_content = ""
-    segment_count = 0
-    for i, segment in enumerate(segments, 1):
-        # Check if stop was requested
-        if stop_callback and stop_callback():
-            print("Transcription stopped by user request")
-            if log_callback:
-                log_callback("Transcription stopped by user request")
-            break
-            
-        start_time = format_timestamp(segment.start)
-        end_time = format_timestamp(segment.end)
-        text = segment.text.strip()
-        
-        log_message = f"{i}: {start_time} --> {end_time} | {text}"
-        print(log_message)
-        if log_callback:
-            log_callback(log_message)
+    stopped = False
+    try:
+        for i, segment in enumerate(segments, writer.count + 1):
+            # Check if stop was requested
+            if stop_callback and stop_callback():
+                stopped = True
+                print("Transcription stopped by user request")
+                if log_callback:
+                    log_callback("Transcription stopped by user request")
+                break
+                
+            # The parallel and streamed paths detect the language while the first chunk is consumed
+            writer.language = writer.language or audio_info.get("language")
+            text = segment.text.strip()
+            writer.write(segment.start, segment.end, text)
+            if segment_callback:
+                segment_callback(i, segment.start, segment.end, text)
             
-        srt_content += f"{i}\n{start_time} --> {end_time}\n{text}\n\n"
-        segment_count = i
-
-    # Only save if not stopped or if we have some content
-    if srt_content and not stop_callback:
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(srt_content)
+            log_message = f"{i}: {format_timestamp(segment.start)} --> {format_timestamp(segment.end)} | {text}"
+            console_log(log_message, log_callback)
+    finally:
+        # On errors the part file keeps every cue written so far
+        writer.close()
+        # Stops pending chunk workers when the loop ends early
+        if hasattr(segments, "close"):
+            segments.close()
 
-        print(f"Subtitles saved to: {output_path} ({segment_count} segments)")
+    # Save whatever was transcribed, including partial results of a stopped run
+    if writer.count:
+        # A stopped run keeps its part file and checkpoint so it can be resumed
+        writer.commit(keep_checkpoint=stopped)
+        status = " (stopped early)" if stopped else ""
+        print(f"Subtitles saved to: {output_path} ({writer.count} segments){status}")
         if log_callback:
-            log_callback(f"Subtitles saved to: {output_path} ({segment_count} segments)")
+            log_callback(f"Subtitles saved to: {output_path} ({writer.count} segments){status}")
     else:
+        writer.discard()
         print("No subtitles were generated or process was stopped immediately")
         if log_callback:
             log_callback("No subtitles were generated or process was stopped immediately")
     
+    audio_seconds = audio_info.get("duration", 0.0)
+    wall_seconds = time.perf_counter() - start_time
+    if audio_seconds:
+        # Real-time factor: processing time per second of audio (lower is faster)
+        rtf_message = (f"Profile {describe_profile(settings)}: {audio_seconds:.0f}s audio in {wall_seconds:.1f}s, "
+                       f"real-time factor {wall_seconds / audio_seconds:.3f}")
+        console_log(rtf_message, log_callback)
+    peak_rss = peak_rss_bytes()
+    if peak_rss:
+        # The counter never goes down, so only a rise can be attributed to this job
+        source = "reached during this job" if not peak_rss_before or peak_rss > peak_rss_before else "set by an earlier job"
+        peak_message = f"Process peak memory (RSS): {peak_rss / 1024 ** 2:.0f} MB ({source})"
+        console_log(peak_message, log_callback)
+    if stats is not None:
+        stats.update({
+            "audio_seconds": audio_seconds,
+            "wall_seconds": wall_seconds,
+            "segments": writer.count,
+            "stopped": stopped,
+            "settings": settings,
+            "process_peak_rss_bytes": peak_rss,
+            "peak_rss_this_job": bool(peak_rss) and (not peak_rss_before or peak_rss > peak_rss_before),
+        })
     return str(output_path)
\ No newline at end of file
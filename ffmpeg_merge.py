@@ -0,0 +1,524 @@
+import os
+import json
+import time
+import threading
+import subprocess
+
+from process_utils import hidden_window_startupinfo
+
+# ========== Subtitle Burn-in Defaults ==========
+DEFAULT_SUBTITLE_STYLE = {
+    "font_name": "Microsoft YaHei",
+    "font_size": "16",
+    "font_color": "ffffff",
+    "outline_color": "000000",
+    "outline_width": "1",
+    "bold": False,
+    "italic": False,
+    "position": "bottom",
+    "margin_vertical": "25",
+    "margin_horizontal": "20",
+}
+DEFAULT_VIDEO_CODEC = "libx264"
+DEFAULT_AUDIO_CODEC = "aac"
+DEFAULT_VIDEO_QUALITY = "23"
+# ========== Encoder Speed Presets ==========
+# Named speed/quality trade-offs mapped onto each encoder's own flags; None keeps the encoder default
+ENCODER_SPEED_PRESETS = {
+    "fastest": {"libx264": ["-preset", "ultrafast"], "libx265": ["-preset", "ultrafast"],
+                "libvpx-vp9": ["-deadline", "realtime", "-cpu-used", "8"]},
+    "fast": {"libx264": ["-preset", "veryfast"], "libx265": ["-preset", "veryfast"],
+             "libvpx-vp9": ["-deadline", "good", "-cpu-used", "5"]},
+    "balanced": {"libx264": ["-preset", "medium"], "libx265": ["-preset", "medium"],
+                 "libvpx-vp9": ["-deadline", "good", "-cpu-used", "2"]},
+    "quality": {"libx264": ["-preset", "slow"], "libx265": ["-preset", "slow"],
+                "libvpx-vp9": ["-deadline", "good", "-cpu-used", "1"]},
+}
+X264_TUNES = ["film", "animation", "grain", "stillimage", "fastdecode", "zerolatency"]
+X265_TUNES = ["animation", "grain", "fastdecode", "zerolatency"]
+# Stream codec name ffprobe reports for each audio encoder; a matching input stream is copied
+AUDIO_ENCODER_STREAM_CODECS = {"aac": "aac", "libfdk_aac": "aac", "libmp3lame": "mp3", "mp3": "mp3",
+                               "libopus": "opus", "libvorbis": "vorbis", "ac3": "ac3", "flac": "flac"}
+
+# "burn" re-encodes the video with the subtitles drawn in; "mux" adds them as a selectable text track
+MERGE_MODES = ("burn", "mux")
+# Text subtitle codec per output container for mux mode; None keeps the input format (SRT or ASS).
+# WebM is left out: it only takes VP8/VP9/AV1 with Vorbis/Opus, so stream-copying most sources into it fails
+SOFT_SUBTITLE_CODECS = {".mp4": "mov_text", ".m4v": "mov_text", ".mov": "mov_text", ".mkv": None}
+# Source subtitle codecs FFmpeg can convert to mov_text; bitmap ones (PGS, VobSub, DVB) cannot go into MP4/MOV
+TEXT_SUBTITLE_CODECS = {"subrip", "srt", "ass", "ssa", "mov_text", "webvtt", "text"}
+# Fallbacks for estimate_merge_seconds until merge_stats.jsonl has history: realtime factor per codec
+# for a burn-in at 1080p, and read+write throughput of a stream copy
+BURN_SPEED_ESTIMATES = {"libx264": 1.5, "libx265": 0.5, "libvpx-vp9": 0.3}
+DEFAULT_BURN_SPEED = 1.0
+MUX_BYTES_PER_SECOND = 150 * 1024 ** 2
+# Per-job encode stats, one JSON object per line
+DEFAULT_MERGE_STATS_PATH = os.path.join(os.path.expanduser("~"), ".srt_translator", "merge_stats.jsonl")
+
+
+def hex_to_ass_color(hex_color):
+    """Convert an RRGGBB hex color to ASS &HBBGGRR notation, or None if it is not valid"""
+    hex_color = (hex_color or "").lstrip('#')
+    if len(hex_color) != 6:
+        return None
+    r, g, b = hex_color[0:2], hex_color[2:4], hex_color[4:6]
+    return f"&H{b}{g}{r}"
+
+
+def build_style_string(font_name, font_size, font_color, outline_color, outline_width,
+                       bold, italic, position, margin_vertical, margin_horizontal):
+    """Build the force_style string for FFmpeg's subtitles filter"""
+    font_style = [f"FontName={font_name}", f"FontSize={font_size}"]
+
+    primary = hex_to_ass_color(font_color)
+    if primary:
+        font_style.append(f"PrimaryColour={primary}")
+    outline = hex_to_ass_color(outline_color)
+    if outline:
+        font_style.append(f"OutlineColour={outline}")
+    font_style.append(f"Outline={outline_width}")
+
+    if bold:
+        font_style.append("Bold=1")
+    if italic:
+        font_style.append("Italic=1")
+
+    if position == "top":
+        font_style.append(f"MarginV={margin_vertical}")
+        font_style.append("Alignment=8")  # Top center
+    elif position == "center":
+        font_style.append("Alignment=5")  # Middle center
+    else:  # bottom
+        font_style.append(f"MarginV={margin_vertical}")
+        font_style.append("Alignment=2")  # Bottom center
+
+    font_style.append(f"MarginL={margin_horizontal}")
+    font_style.append(f"MarginR={margin_horizontal}")
+    return ",".join(font_style)
+
+
+def build_mux_command(video_path, srt_path, output_path, subtitle_language=None, source_subtitle_codecs=None):
+    """Build the FFmpeg command that adds an SRT/ASS file as a subtitle track without re-encoding.
+
+    The new track becomes the first subtitle stream. Subtitle tracks already in the
+    video are kept after it: all of them in Matroska, and in MP4/MOV only the text
+    tracks listed in `source_subtitle_codecs` (from probe_subtitle_codecs; None drops them).
+    """
+    if not video_path or not srt_path or not output_path:
+        raise ValueError("Please select all required files")
+    extension = os.path.splitext(output_path)[1].lower()
+    if extension not in SOFT_SUBTITLE_CODECS:
+        raise ValueError(f"Soft subtitles need an {', '.join(SOFT_SUBTITLE_CODECS)} output, not '{extension or output_path}'")
+    subtitle_codec = SOFT_SUBTITLE_CODECS[extension]
+    if subtitle_codec is None:
+        subtitle_codec = "ass" if os.path.splitext(srt_path)[1].lower() in (".ass", ".ssa") else "srt"
+
+    cmd = [
+        "ffmpeg", "-y",
+        "-i", os.path.normpath(video_path),
+        "-i", os.path.normpath(srt_path),
+        "-map", "0:v", "-map", "0:a?", "-map", "1:0",
+    ]
+    if SOFT_SUBTITLE_CODECS[extension] is None:
+        # Matroska holds any subtitle format, so existing tracks are copied untouched
+        cmd.extend(["-map", "0:s?", "-c:v", "copy", "-c:a", "copy", "-c:s", "copy", "-c:s:0", subtitle_codec])
+    else:
+        # MP4/MOV only hold mov_text, so only existing text tracks are kept and converted along with the new one
+        for index, codec in enumerate(source_subtitle_codecs or []):
+            if codec in TEXT_SUBTITLE_CODECS:
+                cmd.extend(["-map", f"0:s:{index}"])
+        cmd.extend(["-c:v", "copy", "-c:a", "copy", "-c:s", subtitle_codec])
+    if subtitle_language:
+        cmd.extend(["-metadata:s:s:0", f"language={subtitle_language}"])
+    if extension in (".mp4", ".m4v", ".mov"):
+        # Index up front so players can seek before the whole file is read
+        cmd.extend(["-movflags", "+faststart"])
+    cmd.append(os.path.normpath(output_path))
+    return cmd
+
+
+def build_ffmpeg_command(video_path, srt_path, output_path, video_codec=DEFAULT_VIDEO_CODEC,
+                         audio_codec=DEFAULT_AUDIO_CODEC, video_quality=DEFAULT_VIDEO_QUALITY, mode="burn",
+                         speed_preset=None, tune=None, threads=None, audio_passthrough=True, source_audio_codec=None,
+                         source_subtitle_codecs=None, **style):
+    """Build the FFmpeg command that burns an SRT file into a video.
+
+    `style` takes the keys of DEFAULT_SUBTITLE_STYLE; missing keys use the defaults.
+    `speed_preset` is a key of ENCODER_SPEED_PRESETS, `tune` an x264/x265 tune and
+    `threads` the encoder thread count (0/None = FFmpeg's choice). With `audio_passthrough`,
+    audio whose `source_audio_codec` (filled in by probe_source_streams) is what
+    `audio_codec` would produce is copied instead of re-encoded. The builder itself
+    never runs ffprobe, so it is cheap to call from the UI thread.
+    With mode="mux" the subtitles are added as a soft track instead (see build_mux_command)
+    and the codec, quality and style options do not apply.
+    """
+    if mode not in MERGE_MODES:
+        raise ValueError(f"Unknown merge mode: {mode}")
+    if speed_preset and speed_preset not in ENCODER_SPEED_PRESETS:
+        raise ValueError(f"Unknown speed preset: {speed_preset}")
+    if mode == "mux":
+        return build_mux_command(video_path, srt_path, output_path, source_subtitle_codecs=source_subtitle_codecs)
+    if not video_path or not srt_path or not output_path:
+        raise ValueError("Please select all required files")
+    unknown = set(style) - set(DEFAULT_SUBTITLE_STYLE)
+    if unknown:
+        raise TypeError(f"Unknown subtitle style options: {', '.join(sorted(unknown))}")
+
+    if audio_passthrough and audio_passthrough_codec(audio_codec, source_audio_codec) == "copy":
+        audio_codec = "copy"
+
+    # Normalize file paths to handle Windows paths and special characters
+    video_path = os.path.normpath(video_path)
+    srt_path = os.path.normpath(srt_path)
+    output_path = os.path.normpath(output_path)
+
+    # Convert Windows paths to forward slashes for FFmpeg
+    if os.name == 'nt':  # Windows
+        video_path = video_path.replace('\\', '/')
+        srt_path = srt_path.replace('\\', '/')
+        srt_path = srt_path.replace(':', '\\:')
+        output_path = output_path.replace('\\', '/')
+
+    style_string = build_style_string(**dict(DEFAULT_SUBTITLE_STYLE, **style))
+
+    # For Windows paths with colons, use single quotes to wrap the entire path
+    subtitles_filter = f"subtitles='{srt_path}':force_style='{style_string}'"
+
+    cmd = [
+        "ffmpeg", "-y",
+        "-i", video_path,
+        "-vf", subtitles_filter,
+        "-c:v", video_codec,
+        "-c:a", audio_codec
+    ]
+
+    # Add CRF if using x264 or x265
+    if video_codec in ["libx264", "libx265"]:
+        cmd.extend(["-crf", str(video_quality)])
+
+    if speed_preset:
+        cmd.extend(ENCODER_SPEED_PRESETS[speed_preset].get(video_codec, []))
+    if tune and tune in {"libx264": X264_TUNES, "libx265": X265_TUNES}.get(video_codec, []):
+        cmd.extend(["-tune", tune])
+    if video_codec == "libvpx-vp9":
+        # Row-based multithreading; without it VP9 barely uses more than a few cores
+        cmd.extend(["-row-mt", "1"])
+    if threads:
+        cmd.extend(["-threads", str(threads)])
+
+    cmd.append(output_path)
+    return cmd
+
+
+def ffmpeg_available():
+    try:
+        subprocess.run(["ffmpeg", "-version"], capture_output=True, check=True)
+        return True
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return False
+
+
+def probe_duration(path):
+    """Duration of a media file in seconds via ffprobe, or None if it cannot be read"""
+    try:
+        result = subprocess.run(
+            ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "default=nw=1:nk=1", str(path)],
+            capture_output=True, text=True, encoding="utf-8", errors="ignore", startupinfo=hidden_window_startupinfo()
+        )
+        return float(result.stdout.strip()) or None
+    except (OSError, ValueError):
+        return None
+
+
+def probe_audio_codec(path):
+    """Codec name of the first audio stream via ffprobe, or None if there is none or it cannot be read"""
+    try:
+        result = subprocess.run(
+            ["ffprobe", "-v", "error", "-select_streams", "a:0", "-show_entries", "stream=codec_name",
+             "-of", "default=nw=1:nk=1", str(path)],
+            capture_output=True, text=True, encoding="utf-8", errors="ignore", startupinfo=hidden_window_startupinfo()
+        )
+        return result.stdout.strip().splitlines()[0] if result.stdout.strip() else None
+    except OSError:
+        return None
+
+
+def probe_subtitle_codecs(path):
+    """Codec names of the subtitle streams via ffprobe, in stream order; [] if there are none or it cannot be read"""
+    try:
+        result = subprocess.run(
+            ["ffprobe", "-v", "error", "-select_streams", "s", "-show_entries", "stream=codec_name",
+             "-of", "default=nw=1:nk=1", str(path)],
+            capture_output=True, text=True, encoding="utf-8", errors="ignore", startupinfo=hidden_window_startupinfo()
+        )
+        return [line.strip() for line in result.stdout.splitlines() if line.strip()]
+    except OSError:
+        return []
+
+
+def probe_source_streams(video_path, options):
+    """Return merge `options` with what the builder needs to know about the source streams.
+
+    Fills in source_audio_codec when audio_passthrough is on, and source_subtitle_codecs
+    for mux mode. This runs ffprobe, so call it from the worker thread that runs the merge.
+    """
+    options = dict(options)
+    if options.get("mode", "burn") == "mux":
+        if "source_subtitle_codecs" not in options:
+            options["source_subtitle_codecs"] = probe_subtitle_codecs(video_path)
+    elif options.get("audio_passthrough", True) and "source_audio_codec" not in options:
+        options["source_audio_codec"] = probe_audio_codec(video_path)
+    return options
+
+
+def audio_passthrough_codec(audio_codec, source_codec):
+    """"copy" when the source audio is already what `audio_codec` produces, else `audio_codec`"""
+    if source_codec and source_codec == AUDIO_ENCODER_STREAM_CODECS.get(audio_codec):
+        return "copy"
+    return audio_codec
+
+
+def encoder_summary(cmd):
+    """The encoding flags of a merge command, for the log (everything but inputs, filters and output)"""
+    flags = []
+    skip_next = False
+    for arg in cmd[1:-1]:
+        if skip_next:
+            skip_next = False
+            continue
+        if arg in ("-i", "-vf", "-progress"):
+            skip_next = True
+            continue
+        if arg in ("-y", "-nostats"):
+            continue
+        flags.append(arg)
+    summary = " ".join(flags)
+    if "-c:a" in cmd and cmd[cmd.index("-c:a") + 1] == "copy":
+        summary += " (audio passthrough)"
+    return summary
+
+
+def _input_path(cmd):
+    try:
+        return cmd[cmd.index("-i") + 1]
+    except (ValueError, IndexError):
+        return None
+
+
+def _parse_float(value):
+    try:
+        return float(value.rstrip("x").strip())
+    except (AttributeError, ValueError):
+        return None
+
+
+class FFmpegProgress:
+    """Accumulates FFmpeg's `-progress` key=value blocks into progress snapshots.
+
+    update() returns a snapshot dict at the end of every block (the "progress=" line):
+    percent, out_seconds, fps, speed, eta_seconds, frame, total_size, bitrate, done.
+    """
+
+    def __init__(self, duration=None):
+        self.duration = duration
+        self.values = {}
+
+    def update(self, line):
+        key, _, value = line.partition("=")
+        key, value = key.strip(), value.strip()
+        if key != "progress":
+            self.values[key] = value
+            return None
+        return self.snapshot(done=value == "end")
+
+    def snapshot(self, done=False):
+        values = self.values
+        out_us = values.get("out_time_us") or values.get("out_time_ms")
+        out_seconds = None
+        if out_us and out_us.lstrip("-").isdigit():
+            # out_time_ms is misnamed by FFmpeg and is in microseconds as well
+            out_seconds = max(0.0, int(out_us) / 1000000)
+        speed = _parse_float(values.get("speed"))
+        percent = eta = None
+        if self.duration and out_seconds is not None:
+            percent = 100.0 if done else min(100.0, out_seconds / self.duration * 100)
+            if speed:
+                eta = 0.0 if done else max(0.0, (self.duration - out_seconds) / speed)
+        frame = values.get("frame")
+        total_size = values.get("total_size")
+        return {
+            "percent": percent,
+            "out_seconds": out_seconds,
+            "fps": _parse_float(values.get("fps")),
+            "speed": speed,
+            "eta_seconds": eta,
+            "frame": int(frame) if frame and frame.isdigit() else None,
+            "total_size": int(total_size) if total_size and total_size.isdigit() else None,
+            "bitrate": values.get("bitrate"),
+            "done": done,
+        }
+
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    return f"{seconds // 3600:d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def format_progress(progress):
+    """One-line human readable form of an FFmpegProgress snapshot"""
+    parts = []
+    if progress["percent"] is not None:
+        parts.append(f"{progress['percent']:.1f}%")
+    if progress["out_seconds"] is not None:
+        parts.append(format_duration(progress["out_seconds"]))
+    if progress["fps"]:
+        parts.append(f"{progress['fps']:.1f} fps")
+    if progress["speed"]:
+        parts.append(f"{progress['speed']:.2f}x")
+    if progress["eta_seconds"] is not None:
+        parts.append(f"ETA {format_duration(progress['eta_seconds'])}")
+    return " | ".join(parts) or "Encoding..."
+
+
+def run_ffmpeg(cmd, log_callback=None, progress_callback=None, stop_callback=None, process_callback=None,
+               duration=None, stats=None):
+    """Run an FFmpeg command and return the exit code (None if stopped).
+
+    Progress is read from FFmpeg's machine-readable `-progress` output; every update
+    goes to `progress_callback` as an FFmpegProgress snapshot dict, with a true
+    percentage and ETA when the input duration is known (probed from the first -i
+    input unless given). stderr lines go to `log_callback`. `process_callback` receives
+    the Popen object so the caller can terminate it. A `stats` dict is filled with
+    wall_seconds, duration, frames, average_fps, speed, output_bytes and bitrate_kbps.
+    """
+    if duration is None and _input_path(cmd):
+        duration = probe_duration(_input_path(cmd))
+    cmd = [cmd[0], "-progress", "pipe:1", "-nostats"] + list(cmd[1:])
+
+    start_time = time.perf_counter()
+    process = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        encoding='utf-8',
+        errors='ignore',
+        bufsize=1,
+        startupinfo=hidden_window_startupinfo()
+    )
+    if process_callback:
+        process_callback(process)
+
+    def forward_stderr():
+        for line in iter(process.stderr.readline, ''):
+            line = line.strip()
+            if line and log_callback:
+                log_callback(line)
+
+    stderr_thread = threading.Thread(target=forward_stderr, daemon=True)
+    stderr_thread.start()
+
+    tracker = FFmpegProgress(duration)
+    last = None
+    for line in iter(process.stdout.readline, ''):
+        if stop_callback and stop_callback():
+            process.terminate()
+            process.wait()
+            return None
+        progress = tracker.update(line)
+        if progress is not None:
+            last = progress
+            if progress_callback:
+                progress_callback(progress)
+
+    process.wait()
+    stderr_thread.join(timeout=5)
+    if stop_callback and stop_callback():
+        return None
+    if stats is not None:
+        wall_seconds = time.perf_counter() - start_time
+        frames = last["frame"] if last else None
+        output_bytes = last["total_size"] if last else None
+        media_seconds = (last["out_seconds"] if last else None) or duration
+        stats.update({
+            "returncode": process.returncode,
+            "wall_seconds": wall_seconds,
+            "duration": duration,
+            "frames": frames,
+            "average_fps": frames / wall_seconds if frames and wall_seconds else None,
+            "speed": media_seconds / wall_seconds if media_seconds and wall_seconds else None,
+            "output_bytes": output_bytes,
+            "bitrate_kbps": output_bytes * 8 / media_seconds / 1000 if output_bytes and media_seconds else None,
+        })
+    return process.returncode
+
+
+def _command_video_codec(cmd):
+    try:
+        return cmd[cmd.index("-c:v") + 1]
+    except (ValueError, IndexError):
+        return None
+
+
+def recorded_speed(video_codec, path=DEFAULT_MERGE_STATS_PATH, segments=1):
+    """Average realtime factor of the successful jobs recorded for a video codec, or None.
+
+    Segmented burn-ins run several encoders at once, so they only count towards
+    estimates for the same number of segments.
+    """
+    speeds = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if (record.get("returncode") == 0 and record.get("speed")
+                        and _command_video_codec(record.get("command") or []) == video_codec
+                        and (record.get("segments") or 1) == segments):
+                    speeds.append(record["speed"])
+    except OSError:
+        return None
+    # The most recent jobs reflect the current machine best
+    speeds = speeds[-20:]
+    return sum(speeds) / len(speeds) if speeds else None
+
+
+def estimate_merge_seconds(video_path, mode="burn", video_codec=DEFAULT_VIDEO_CODEC, duration=None,
+                           stats_path=DEFAULT_MERGE_STATS_PATH, segments=1):
+    """Rough wall time of a merge, from recorded job speeds or the built-in fallbacks; None if unknown"""
+    duration = duration or probe_duration(video_path)
+    if mode == "mux":
+        speed = recorded_speed("copy", stats_path)
+        if speed and duration:
+            return duration / speed
+        try:
+            return os.path.getsize(video_path) / MUX_BYTES_PER_SECOND
+        except OSError:
+            return None
+    if not duration:
+        return None
+    speed = recorded_speed(video_codec, stats_path, segments) or BURN_SPEED_ESTIMATES.get(video_codec, DEFAULT_BURN_SPEED)
+    return duration / speed
+
+
+def format_merge_stats(stats):
+    parts = [f"{stats['wall_seconds']:.1f}s wall"]
+    if stats.get("average_fps"):
+        parts.append(f"{stats['average_fps']:.1f} fps average")
+    if stats.get("speed"):
+        parts.append(f"{stats['speed']:.2f}x realtime")
+    if stats.get("bitrate_kbps"):
+        parts.append(f"{stats['bitrate_kbps']:.0f} kb/s output")
+    return ", ".join(parts)
+
+
+def record_merge_stats(cmd, stats, path=DEFAULT_MERGE_STATS_PATH):
+    """Append one job's stats and command to a JSON-lines file for comparing encoder settings"""
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(dict(stats, command=cmd, finished=time.time()), ensure_ascii=False) + "\n")
+    except OSError as e:
+        print(f"Could not record merge stats to {path}: {e}")
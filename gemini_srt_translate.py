@@ -1,52 +1,384 @@
 import os
-import srt
-import google.generativeai as genai
+import re
+import json
 import time
 import argparse
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from rate_limiter import get_rate_limiter, configure_rate_limit, estimate_tokens, normalize_model_name
+from translation_cache import TranslationCache, DEFAULT_CACHE_PATH
+from batch_planner import BatchPlanner, BATCH_NOT_READY, batch_token_budget
+from translation_manifest import cue_hash, load_previous_translations, save_manifest, TranslationJournal
+from process_utils import console_log
 
 # ========== Set Gemini API Key ==========
 API_KEY = "YOUR_API_KEY"
-genai.configure(api_key=API_KEY)
-model = genai.GenerativeModel("gemini-2.5-flash")
+DEFAULT_MODEL_NAME = "gemini-2.5-flash"
+# Built on first use; google.generativeai takes most of a second to import
+model = None
+
+# Number of batches kept in flight at the same time
+DEFAULT_CONCURRENCY = 4
+
+# Bump whenever the prompt changes so cached translations from the old prompt are not reused
+PROMPT_VERSION = 2
+# Times a cue is re-requested after coming back missing or empty before it is left untranslated
+MAX_CUE_ATTEMPTS = 3
+# Put in front of the source text of a cue left untranslated, so the output shows which cues failed
+TRANSLATION_FAILED = f"[Translation failed after {MAX_CUE_ATTEMPTS} attempts]"
+# How often a streaming translation checks for newly produced cues
+STREAM_POLL_SECONDS = 0.2
 
 # ========== Translation Function ==========
-def translate_text(text, target_lang):
+def translate_cues(texts, target_lang):
+    """Translate a list of cue texts with an id-tagged JSON protocol.
+
+    Returns {index: translation} for the cues that came back valid; missing or
+    empty cues are simply absent so the caller can re-request just those.
+    """
+    payload = json.dumps([{"id": i + 1, "text": text} for i, text in enumerate(texts)], ensure_ascii=False)
     prompt = (
-        f"Please translate all the captions below into {target_lang}, only output the translated content, and the order should be consistent with the original text. Each timestamp's content should be replaced with the {target_lang} translation, and no other content should be added to ensure the accuracy of the timeline. Pay attention to the translation of proper nouns and names to ensure accuracy. Try to align the proper tone and style with the original text. If the original text is in a specific format, please maintain that format in the translation.\n\n"
-        f"Do not add any explanations, formats, or unnecessary content, just output the translated subtitle text, with each line corresponding to the original subtitle line:\n\n{text}"
+        f"Translate the subtitle cues below into {target_lang}. The input is a JSON array of objects with an \"id\" and a \"text\". "
+        f"Return a JSON array with exactly one object per input cue, using the same \"id\" and the {target_lang} translation as \"text\". "
+        "Never merge, split, skip or reorder cues, and keep line breaks inside a cue's text. Pay attention to the translation of proper nouns and names to ensure accuracy. "
+        "Try to align the proper tone and style with the original text. Do not add any explanations, only output the JSON array:\n\n"
+        f"{payload}"
     )
+    result = _generate(prompt, estimate_tokens(payload), generation_config={"response_mime_type": "application/json"})
+    if result is None:
+        return {}
+    return parse_cue_response(result, len(texts))
+
+def parse_cue_response(response_text, cue_count):
+    """Parse an id-tagged response into {index: text}, dropping unknown ids and empty cues"""
+    text = response_text.strip()
+    # Models sometimes wrap the JSON in a markdown code fence
+    text = re.sub(r"^```(?:json)?\s*|\s*```$", "", text)
+    pairs = []
+    try:
+        data = json.loads(text)
+        if isinstance(data, dict):
+            data = [{"id": key, "text": value} for key, value in data.items()]
+        for item in data:
+            if isinstance(item, dict):
+                pairs.append((item.get("id"), item.get("text")))
+    except (ValueError, TypeError):
+        # Fall back to "[id] text" lines, continuation lines belong to the previous cue
+        current = None
+        for line in text.splitlines():
+            match = re.match(r"^\s*\[(\d+)\]\s?(.*)$", line)
+            if match:
+                current = [match.group(1), match.group(2)]
+                pairs.append(current)
+            elif current is not None:
+                current[1] += "\n" + line
+    translations = {}
+    for cue_id, cue_text in pairs:
+        try:
+            index = int(cue_id) - 1
+        except (TypeError, ValueError):
+            continue
+        if 0 <= index < cue_count and isinstance(cue_text, str) and cue_text.strip():
+            translations[index] = cue_text.strip()
+    return translations
+
+def _generate(prompt, output_tokens, generation_config=None):
+    """Call the model through the shared rate limiter; returns the response text or None"""
+    model = get_model()
+    limiter = get_rate_limiter(model.model_name)
+    # Prompt plus the expected translated output
+    estimated_tokens = estimate_tokens(prompt) + output_tokens
     for attempt in range(3):  # Retry up to 3 times
+        limiter.acquire(estimated_tokens)
         try:
-            response = model.generate_content(prompt)
+            if generation_config:
+                response = model.generate_content(prompt, generation_config=generation_config)
+            else:
+                response = model.generate_content(prompt)
+            usage = getattr(response, "usage_metadata", None)
+            if usage and getattr(usage, "total_token_count", 0):
+                limiter.record_usage(usage.total_token_count - estimated_tokens)
             return response.text.strip()
         except Exception as e:
             import traceback
             print(f"[!] NO.{attempt+1} translation failed: {e}")
             traceback.print_exc()
-            time.sleep(5) 
-    return "[Translation failed after 3 attempts]"
+            limiter.backoff(_retry_delay(e, attempt))
+    return None
+
+def _retry_delay(error, attempt):
+    """Use the server-suggested delay on quota errors, otherwise back off exponentially"""
+    match = re.search(r"retry_delay\s*\{\s*seconds:\s*(\d+)", str(error))
+    if match:
+        return int(match.group(1))
+    return 2 ** (attempt + 1)
+
+def configure_gemini(api_key, model_name=DEFAULT_MODEL_NAME):
+    """Set the API key and switch the module-wide model used by every translation call"""
+    global model
+    import google.generativeai as genai
+    genai.configure(api_key=api_key)
+    model = genai.GenerativeModel(model_name)
+    return model
+
+def get_model():
+    """Return the module-wide model, configuring the default one on first use"""
+    if model is None:
+        configure_gemini(API_KEY)
+    return model
+
+def current_model_name():
+    return normalize_model_name(getattr(model, "model_name", DEFAULT_MODEL_NAME))
+
+def open_translation_cache(path=DEFAULT_CACHE_PATH, log_callback=None):
+    """Open the translation memory, or return None (translate without cache) if it is unusable"""
+    try:
+        return TranslationCache(path)
+    except Exception as e:
+        console_log(f"Translation cache unavailable ({path}): {e}", log_callback)
+        return None
+
+# ========== Concurrent Batch Engine ==========
+def translate_batches(next_batch, target_lang, result_callback, concurrency=DEFAULT_CONCURRENCY, stop_callback=None):
+    """Keep up to `concurrency` batches in flight until next_batch() has nothing left.
+
+    next_batch() returns (batch, texts), None when done, or BATCH_NOT_READY while
+    cues are still being produced. result_callback(batch, texts, translations)
+    runs in the calling thread as each batch finishes, with translations as returned by
+    translate_cues, and may queue more work, e.g. a retry of the cues that came back
+    missing. Nothing new is started after a stop request.
+    """
+    concurrency = max(1, int(concurrency))
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        in_flight = {}
+        waiting = False
+
+        def fill():
+            nonlocal waiting
+            waiting = False
+            while len(in_flight) < concurrency and not (stop_callback and stop_callback()):
+                job = next_batch()
+                if job is None:
+                    break
+                if job is BATCH_NOT_READY:
+                    waiting = True
+                    break
+                batch, texts = job
+                in_flight[executor.submit(translate_cues, texts, target_lang)] = (batch, texts)
+
+        fill()
+        while in_flight or waiting:
+            if not in_flight:
+                time.sleep(STREAM_POLL_SECONDS)
+                fill()
+                continue
+            done, _ = wait(in_flight, timeout=STREAM_POLL_SECONDS if waiting else None, return_when=FIRST_COMPLETED)
+            for future in done:
+                batch, texts = in_flight.pop(future)
+                try:
+                    translations = future.result()
+                except Exception as e:
+                    print(f"[!] Batch failed: {e}")
+                    translations = {}
+                result_callback(batch, texts, translations)
+            fill()
+
+class StreamingTranslator:
+    """Translates subtitles in place while a producer (e.g. Whisper) is still adding them.
+
+    The producer calls add() with new cues and finish() when it is done; run() blocks
+    (normally in its own thread) sending batches as soon as they fill up. Cues found in
+    `previous` ({cue_hash: translation} from an earlier output) or in the cache are
+    filled in by add() and never reach the API. Every finished batch is checkpointed
+    to `journal` (a TranslationJournal) when one is given. Cues still missing after
+    MAX_CUE_ATTEMPTS keep their source text behind TRANSLATION_FAILED and are counted
+    in stats["failed"].
+    """
+
+    def __init__(self, target_lang, concurrency=DEFAULT_CONCURRENCY, token_budget=None, cache=None,
+                 log_callback=None, progress_callback=None, stop_callback=None, streaming=True, previous=None, journal=None):
+        self.target_lang = target_lang
+        self.concurrency = concurrency
+        self.cache = cache
+        self.log_callback = log_callback
+        self.progress_callback = progress_callback
+        self.stop_callback = stop_callback
+        self.model_name = current_model_name()
+        self.subtitles = []
+        self.pending = 0
+        self.previous = previous or {}
+        self.journal = journal
+        self.stats = {"cues": 0, "requests": 0, "retried": 0, "cache_hits": 0, "reused": 0, "failed": 0}
+        self._attempts = {}
+        # Source text of every cue whose content now holds a translation, by id(sub)
+        self._translated = {}
+        self.planner = BatchPlanner([], token_budget or batch_token_budget(self.model_name),
+                                    text_of=lambda sub: sub.content, closed=not streaming)
+
+    def add(self, subtitles):
+        """Queue parsed subtitles; returns how many were answered from the cache"""
+        self.subtitles.extend(subtitles)
+        pending = []
+        for sub in subtitles:
+            reused = self.previous.get(cue_hash(sub.content)) if self.previous else None
+            if reused is not None:
+                self._translated[id(sub)] = sub.content
+                sub.content = reused
+            else:
+                pending.append(sub)
+        self.stats["reused"] += len(subtitles) - len(pending)
+        hits = 0
+        if self.cache is not None and pending:
+            cached = self.cache.get_many([sub.content for sub in pending], self.target_lang, self.model_name, PROMPT_VERSION)
+            misses = []
+            for sub in pending:
+                if sub.content in cached:
+                    self._translated[id(sub)] = sub.content
+                    sub.content = cached[sub.content]
+                else:
+                    misses.append(sub)
+            hits = len(pending) - len(misses)
+            pending = misses
+        self.pending += len(pending)
+        self.stats["cache_hits"] += hits
+        self.planner.add(pending)
+        return hits
+
+    def translated_pairs(self):
+        """(source_text, translation) for every cue that holds a translation, in cue order"""
+        return [(self._translated[id(sub)], sub.content) for sub in self.subtitles if id(sub) in self._translated]
+
+    def finish(self):
+        """No more subtitles will be added"""
+        self.planner.close()
+
+    def _next_batch(self):
+        batch = self.planner.next_batch()
+        if batch is None or batch is BATCH_NOT_READY:
+            return batch
+        return batch, [sub.content for sub in batch]
+
+    def _on_batch_done(self, batch, texts, translations):
+        stats = self.stats
+        stats["requests"] += 1
+        missing = []
+        for index, sub in enumerate(batch):
+            if index in translations:
+                self._translated[id(sub)] = texts[index]
+                sub.content = translations[index]
+                continue
+            self._attempts[id(sub)] = self._attempts.get(id(sub), 0) + 1
+            if self._attempts[id(sub)] < MAX_CUE_ATTEMPTS:
+                missing.append(sub)
+            else:
+                sub.content = f"{TRANSLATION_FAILED} {sub.content}"
+                self.stats["failed"] += 1
+                console_log(f"Cue {sub.index} still missing after {MAX_CUE_ATTEMPTS} attempts, marked as failed", self.log_callback)
+        self.planner.report(batch, aligned=len(translations) == len(batch))
+        if self.journal is not None and translations:
+            self.journal.record([(texts[index], translation) for index, translation in translations.items()])
+        if self.cache is not None and translations:
+            self.cache.put_many([(texts[index], translation) for index, translation in translations.items()],
+                                self.target_lang, self.model_name, PROMPT_VERSION)
+        if missing:
+            # Only the missing cues go back to the queue, the rest of the batch is kept
+            stats["retried"] += len(missing)
+            self.planner.requeue(missing)
+            console_log(f"{len(missing)} of {len(batch)} cues missing from response, re-requesting only those", self.log_callback)
+        stats["cues"] += len(batch) - len(missing)
+        console_log(f"Batch of {len(batch)} cues completed ({stats['cues']}/{self.pending})", self.log_callback)
+        if self.progress_callback:
+            self.progress_callback(stats["cues"], self.pending)
+
+    def run(self):
+        """Translate until finish() was called and every queued cue is done; returns the subtitles"""
+        translate_batches(
+            self._next_batch,
+            self.target_lang,
+            self._on_batch_done,
+            concurrency=self.concurrency,
+            stop_callback=self.stop_callback
+        )
+        console_log(f"Used {self.stats['requests']} API requests for {self.stats['cues']} subtitles "
+             f"({self.stats['retried']} cues re-requested)", self.log_callback)
+        if self.stats["failed"]:
+            console_log(f"⚠️ {self.stats['failed']} cues could not be translated and are marked {TRANSLATION_FAILED}",
+                        self.log_callback)
+        return self.subtitles
+
+def translate_subtitles(subtitles, target_lang, concurrency=DEFAULT_CONCURRENCY, token_budget=None, cache=None, log_callback=None, progress_callback=None, stop_callback=None, output_file=None, incremental=True, resume=False):
+    """Translate parsed subtitles in place, returning them in cue order.
+
+    With a cache, cues already translated before are filled in up front and
+    only the misses are batched and sent to the API. Batches are packed up to
+    `token_budget` source tokens (default: per-model budget) and shrink or grow
+    with how well the responses line up. progress_callback(done_cues, total_cues).
+    With `output_file` and `incremental`, cues unchanged since the last translation
+    into that file are reused from its source manifest; the manifest is rewritten
+    afterwards either way.
+    Finished batches are also checkpointed to `<output_file>.journal`; with `resume`
+    the cues in that journal are not translated again. The journal is deleted once a
+    run completes without a stop request.
+    """
+    previous = None
+    journal = None
+    if output_file:
+        model_name = current_model_name()
+        if incremental:
+            previous = load_previous_translations(output_file, target_lang, model_name, PROMPT_VERSION)
+        journal = TranslationJournal(output_file, target_lang, model_name, PROMPT_VERSION, resume=resume,
+                                     log_callback=log_callback)
+        if journal.entries:
+            console_log(f"Resuming: {len(journal.entries)} cues already translated in {journal.path}", log_callback)
+            previous = dict(previous or {}, **journal.entries)
+    translator = StreamingTranslator(target_lang, concurrency=concurrency, token_budget=token_budget, cache=cache,
+                                     log_callback=log_callback, progress_callback=progress_callback,
+                                     stop_callback=stop_callback, streaming=False, previous=previous, journal=journal)
+    try:
+        hits = translator.add(subtitles)
+        if previous:
+            console_log(f"Incremental: {translator.stats['reused']} cues reused from earlier runs, "
+                 f"{len(subtitles) - translator.stats['reused']} new or edited", log_callback)
+        if cache is not None:
+            console_log(f"Translation cache: {hits} hits, {translator.pending} misses", log_callback)
+        console_log(f"Translating {translator.pending} subtitles ({concurrency} concurrent, {translator.planner.token_budget} tokens per batch)", log_callback)
+        translator.run()
+    finally:
+        if journal is not None:
+            journal.close()
+    if output_file:
+        save_manifest(output_file, translator.translated_pairs(), target_lang, translator.model_name, PROMPT_VERSION)
+        if stop_callback and stop_callback():
+            console_log(f"Progress checkpointed to {journal.path}; resume to continue", log_callback)
+        else:
+            journal.discard()
+    return subtitles
 
 # ========== Main Translation Process ==========
-def translate_srt(input_file, output_file, target_lang):
+def translate_srt(input_file, output_file, target_lang, concurrency=DEFAULT_CONCURRENCY, requests_per_minute=None, tokens_per_minute=None, use_cache=True, cache_path=DEFAULT_CACHE_PATH, token_budget=None, incremental=True, resume=False):
+    """Translate input_file into output_file.
+
+    With `incremental`, only cues that are new or edited since the previous run into
+    output_file are sent to the API; the rest reuse the earlier translations. With
+    `resume`, cues checkpointed by an interrupted run into output_file are not
+    translated again.
+    """
+    import srt
+
+    if requests_per_minute or tokens_per_minute:
+        configure_rate_limit(current_model_name(), requests_per_minute, tokens_per_minute)
+
     with open(input_file, "r", encoding="utf-8") as f:
         srt_content = f.read()
 
     subtitles = list(srt.parse(srt_content))
-    translated_subs = []
-    batch_size = 10  # Translate 10 subtitles at a time
-
-    for i in range(0, len(subtitles), batch_size):
-        print(f"Now translating batch {i // batch_size + 1} of {len(subtitles) // batch_size + 1}...")
-        batch = subtitles[i:i+batch_size]
-        batch_text = "\n".join(sub.content for sub in batch)
-        translated = translate_text(batch_text, target_lang)
-
-        translated_lines = translated.strip().split("\n")
-        for j, sub in enumerate(batch):
-            if j < len(translated_lines):
-                sub.content = translated_lines[j]
-            translated_subs.append(sub)
-        time.sleep(10) 
+    cache = open_translation_cache(cache_path) if use_cache else None
+    try:
+        translated_subs = translate_subtitles(subtitles, target_lang, concurrency=concurrency, token_budget=token_budget, cache=cache,
+                                              output_file=output_file, incremental=incremental, resume=resume)
+    finally:
+        if cache is not None:
+            cache.close()
+
     with open(output_file, "w", encoding="utf-8") as f:
         f.write(srt.compose(translated_subs))
 
@@ -58,11 +390,22 @@ def main():
     parser.add_argument("--input_file", required=True, help="Path to the input SRT file")
     parser.add_argument("--output_file", required=True, help="Path to the output SRT file")
     parser.add_argument("--target_lang", default="zh", help="Target language for translation (default: 'zh')")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help=f"Number of batches translated at the same time (default: {DEFAULT_CONCURRENCY})")
+    parser.add_argument("--rpm", type=int, default=None, help="Requests per minute allowed for the model (default: model quota)")
+    parser.add_argument("--tpm", type=int, default=None, help="Tokens per minute allowed for the model (default: model quota)")
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or write the translation cache")
+    parser.add_argument("--cache-path", default=DEFAULT_CACHE_PATH, help=f"Translation cache database (default: {DEFAULT_CACHE_PATH})")
+    parser.add_argument("--batch-tokens", type=int, default=None, help="Source tokens packed into one request (default: per-model budget)")
+    parser.add_argument("--full", action="store_true", help="Retranslate every cue instead of only the ones changed since the last run")
+    parser.add_argument("--resume", action="store_true", help="Continue an interrupted run from its checkpoint journal")
     args = parser.parse_args()
     input_file = args.input_file
     output_file = args.output_file
     target_lang = args.target_lang
-    translate_srt(input_file, output_file, target_lang)
+    translate_srt(input_file, output_file, target_lang, concurrency=args.concurrency,
+                  requests_per_minute=args.rpm, tokens_per_minute=args.tpm,
+                  use_cache=not args.no_cache, cache_path=args.cache_path,
+                  token_budget=args.batch_tokens, incremental=not args.full, resume=args.resume)
 
 if __name__ == "__main__":
     main()
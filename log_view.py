@@ -0,0 +1,107 @@
+import os
+import sys
+import queue
+import logging
+import subprocess
+import tkinter as tk
+from logging.handlers import RotatingFileHandler
+
+# Lines kept in a log widget; older lines are dropped from the top
+DEFAULT_MAX_LINES = 5000
+# Full logs spill to rotating files on disk
+LOG_DIR = os.path.join(os.path.expanduser("~"), ".srt_translator", "logs")
+LOG_FILE_MAX_BYTES = 10 * 1024 * 1024
+LOG_FILE_BACKUPS = 3
+# How often the Tk main loop drains queued messages, and how many it takes per tick
+DRAIN_INTERVAL_MS = 100
+MAX_MESSAGES_PER_DRAIN = 1000
+
+
+def open_path(path):
+    """Open a file with the platform's default application"""
+    if os.name == 'nt':
+        os.startfile(path)
+    elif sys.platform == 'darwin':
+        subprocess.Popen(["open", path])
+    else:
+        subprocess.Popen(["xdg-open", path])
+
+
+class QueuedTextLog:
+    """Thread-safe log surface for a Tk text widget.
+
+    Worker threads call write() which only puts the message on a queue. The Tk
+    main loop drains the queue on an after() timer, inserts each batch with a
+    single widget call and trims the widget to the last `max_lines` lines.
+    With a `name`, every message is also kept in a rotating file under LOG_DIR.
+    """
+
+    def __init__(self, root, widget, max_lines=DEFAULT_MAX_LINES, on_message=None, name=None):
+        self.root = root
+        self.widget = widget
+        self.max_lines = max_lines
+        # Called on the main thread with the newest message of each batch (e.g. status bar)
+        self.on_message = on_message
+        self._queue = queue.SimpleQueue()
+        self.log_path = None
+        self._file_logger = None
+        if name:
+            self._open_log_file(name)
+        self.root.after(DRAIN_INTERVAL_MS, self._drain)
+
+    def _open_log_file(self, name):
+        try:
+            os.makedirs(LOG_DIR, exist_ok=True)
+            self.log_path = os.path.join(LOG_DIR, f"{name}.log")
+            handler = RotatingFileHandler(self.log_path, maxBytes=LOG_FILE_MAX_BYTES,
+                                          backupCount=LOG_FILE_BACKUPS, encoding="utf-8")
+        except OSError:
+            # Logging to disk is best effort; the widget still works without it
+            self.log_path = None
+            return
+        handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        self._file_logger = logging.getLogger(f"srt_translator.{name}")
+        self._file_logger.propagate = False
+        self._file_logger.setLevel(logging.INFO)
+        self._file_logger.handlers[:] = [handler]
+
+    def open_full_log(self):
+        """Open the complete on-disk log, including lines trimmed from the widget"""
+        if not self.log_path or not os.path.exists(self.log_path):
+            return False
+        for handler in self._file_logger.handlers:
+            handler.flush()
+        open_path(self.log_path)
+        return True
+
+    def write(self, message):
+        """Queue a message; safe to call from any thread and never blocks"""
+        self._queue.put(str(message))
+
+    def _drain(self):
+        messages = []
+        try:
+            while len(messages) < MAX_MESSAGES_PER_DRAIN:
+                messages.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+
+        if messages:
+            if self._file_logger:
+                for message in messages:
+                    self._file_logger.info(message)
+            self.widget.insert(tk.END, "\n".join(messages) + "\n")
+            self._trim()
+            self.widget.see(tk.END)
+            if self.on_message:
+                self.on_message(messages[-1])
+
+        # Come back right away if there is still a backlog
+        self.root.after(1 if len(messages) == MAX_MESSAGES_PER_DRAIN else DRAIN_INTERVAL_MS, self._drain)
+
+    def _trim(self):
+        # The text widget always ends with an empty line after the last newline
+        line_count = int(self.widget.index("end-1c").split(".")[0]) - 1
+        excess = line_count - self.max_lines
+        if excess > 0:
+            self.widget.delete("1.0", f"{excess + 1}.0")
@@ -0,0 +1,108 @@
+import os
+import multiprocessing
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from process_utils import make_log
+
+SAMPLING_RATE = 16000
+# Target length of one chunk; chunks are only cut inside silences found by VAD
+DEFAULT_CHUNK_SECONDS = 300
+
+TranscribedSegment = namedtuple("TranscribedSegment", ["start", "end", "text"])
+
+# Model loaded once per worker process by _init_worker
+_worker_model = None
+
+
+def default_threads_per_worker(workers):
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+
+def plan_chunks(audio, sampling_rate=SAMPLING_RATE, chunk_seconds=DEFAULT_CHUNK_SECONDS):
+    """Split audio into (start_sample, end_sample) chunks of about chunk_seconds, cutting only in silence"""
+    from faster_whisper.vad import get_speech_timestamps, VadOptions
+
+    speech = get_speech_timestamps(audio, VadOptions(min_silence_duration_ms=500), sampling_rate=sampling_rate)
+    if not speech:
+        return [(0, len(audio))]
+
+    target = int(chunk_seconds * sampling_rate)
+    chunks = []
+    chunk_start = 0
+    for previous, region in zip(speech, speech[1:]):
+        if region["end"] - chunk_start > target:
+            # Cut in the middle of the silence between two speech regions
+            cut = (previous["end"] + region["start"]) // 2
+            chunks.append((chunk_start, cut))
+            chunk_start = cut
+    chunks.append((chunk_start, len(audio)))
+    return chunks
+
+
+def _init_worker(model_path, device, compute_type, cpu_threads):
+    global _worker_model
+    from faster_whisper import WhisperModel
+    _worker_model = WhisperModel(model_path, device=device, compute_type=compute_type, cpu_threads=cpu_threads)
+
+
+def _transcribe_chunk(audio, offset, language, transcribe_options):
+    segments, info = _worker_model.transcribe(audio, language=language, **transcribe_options)
+    # Shift chunk-relative timestamps back onto the timeline of the whole file
+    return info.language, [TranscribedSegment(offset + s.start, offset + s.end, s.text) for s in segments]
+
+
+def transcribe_parallel(audio, model_path, workers=2, threads_per_worker=0, device="cpu", compute_type="default",
+                        chunk_seconds=DEFAULT_CHUNK_SECONDS, language=None, transcribe_options=None,
+                        log_callback=None, info=None):
+    """Transcribe silence-separated chunks in a process pool and yield segments in timeline order.
+
+    `audio` is a file path or a 16 kHz mono float32 array. Each worker process loads its
+    own model with `threads_per_worker` CPU threads (0 = share the cores evenly). Without
+    a language, the first chunk is transcribed alone to detect it, then used for the rest.
+    An `info` dict, if given, receives the audio duration and language.
+    """
+    from faster_whisper import decode_audio
+
+    log = make_log(log_callback)
+
+    if isinstance(audio, (str, os.PathLike)):
+        audio = decode_audio(str(audio), sampling_rate=SAMPLING_RATE)
+    if info is not None:
+        info["duration"] = len(audio) / SAMPLING_RATE
+    transcribe_options = transcribe_options or {}
+    threads_per_worker = threads_per_worker or default_threads_per_worker(workers)
+
+    chunks = plan_chunks(audio, chunk_seconds=chunk_seconds)
+    log(f"Split {len(audio) / SAMPLING_RATE:.0f}s of audio into {len(chunks)} chunks "
+        f"for {workers} workers x {threads_per_worker} threads")
+
+    # spawn: forking a process that already runs ctranslate2 threads is not safe
+    executor = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(str(model_path), device, compute_type, threads_per_worker)
+    )
+    try:
+        remaining = list(enumerate(chunks))
+        if language is None:
+            index, (start, end) = remaining.pop(0)
+            language, segments = executor.submit(
+                _transcribe_chunk, audio[start:end], start / SAMPLING_RATE, None, transcribe_options
+            ).result()
+            log(f"Detected language: {language} (chunk 1/{len(chunks)} done)")
+            if info is not None:
+                info["language"] = language
+            yield from segments
+
+        futures = [
+            (index, executor.submit(_transcribe_chunk, audio[start:end], start / SAMPLING_RATE, language, transcribe_options))
+            for index, (start, end) in remaining
+        ]
+        for index, future in futures:
+            _, segments = future.result()
+            log(f"Chunk {index + 1}/{len(chunks)} done")
+            yield from segments
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,23 @@
+import os
+import subprocess
+
+
+def console_log(message, log_callback=None):
+    """Print a message and pass it on to the caller's log callback (the GUI log), if any"""
+    print(message)
+    if log_callback:
+        log_callback(message)
+
+
+def make_log(log_callback=None):
+    """A one-argument log function bound to log_callback, for functions that log a lot"""
+    return lambda message: console_log(message, log_callback)
+
+
+def hidden_window_startupinfo():
+    """STARTUPINFO that keeps FFmpeg/ffprobe console windows from popping up on Windows; None elsewhere"""
+    if os.name != 'nt':
+        return None
+    startupinfo = subprocess.STARTUPINFO()
+    startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+    return startupinfo
@@ -0,0 +1,112 @@
+import threading
+import time
+
+# ========== Per-Model Quotas ==========
+# (requests per minute, tokens per minute), Gemini API free tier defaults
+MODEL_RATE_LIMITS = {
+    "gemini-2.5-flash": (10, 250000),
+    "gemini-2.5-pro": (5, 250000),
+    "gemini-1.5-flash": (15, 1000000),
+    "gemini-1.5-pro": (2, 32000),
+}
+DEFAULT_RATE_LIMIT = (10, 250000)
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def normalize_model_name(model_name):
+    """Strip the 'models/' prefix the SDK adds to model names"""
+    model_name = (model_name or "").strip()
+    if model_name.startswith("models/"):
+        model_name = model_name[len("models/"):]
+    return model_name
+
+
+def estimate_tokens(text):
+    """Rough token estimate (~4 characters per token), good enough for pacing"""
+    return len(text) // 4 + 1
+
+
+class TokenBucket:
+    """Bucket refilled continuously up to `capacity`; the level may go negative to queue callers"""
+
+    def __init__(self, capacity, per_minute):
+        self.capacity = float(capacity)
+        self.rate = float(per_minute) / 60.0
+        self.level = float(capacity)
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, amount):
+        """Reserve `amount` and return the seconds until the reservation is covered"""
+        self.level -= amount
+        return max(0.0, -self.level / self.rate)
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute buckets shared by every caller of one model"""
+
+    def __init__(self, requests_per_minute, tokens_per_minute):
+        self._lock = threading.Lock()
+        self._blocked_until = 0.0
+        self.configure(requests_per_minute, tokens_per_minute)
+
+    def configure(self, requests_per_minute, tokens_per_minute):
+        with self._lock:
+            self.requests_per_minute = max(1, int(requests_per_minute))
+            self.tokens_per_minute = max(1, int(tokens_per_minute))
+            self._requests = TokenBucket(self.requests_per_minute, self.requests_per_minute)
+            self._tokens = TokenBucket(self.tokens_per_minute, self.tokens_per_minute)
+
+    def acquire(self, tokens=1):
+        """Block until one request of `tokens` tokens fits the quota; returns the time waited"""
+        with self._lock:
+            now = time.monotonic()
+            self._requests.refill(now)
+            self._tokens.refill(now)
+            # A single request larger than the whole bucket would otherwise never fit
+            tokens = min(tokens, self._tokens.capacity)
+            wait = max(
+                self._requests.take(1),
+                self._tokens.take(tokens),
+                self._blocked_until - now,
+            )
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def record_usage(self, extra_tokens):
+        """Charge tokens that were under-estimated at acquire time (or refund over-estimates)"""
+        with self._lock:
+            self._tokens.refill(time.monotonic())
+            self._tokens.level = min(self._tokens.capacity, self._tokens.level - extra_tokens)
+
+    def backoff(self, seconds):
+        """Hold back every caller for `seconds`, e.g. after a 429 or transient error"""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+
+def get_rate_limiter(model_name):
+    """Return the shared limiter for a model, creating it from MODEL_RATE_LIMITS on first use"""
+    model_name = normalize_model_name(model_name)
+    with _limiters_lock:
+        limiter = _limiters.get(model_name)
+        if limiter is None:
+            rpm, tpm = MODEL_RATE_LIMITS.get(model_name, DEFAULT_RATE_LIMIT)
+            limiter = RateLimiter(rpm, tpm)
+            _limiters[model_name] = limiter
+        return limiter
+
+
+def configure_rate_limit(model_name, requests_per_minute=None, tokens_per_minute=None):
+    """Override the quota for a model; None keeps the model's default"""
+    model_name = normalize_model_name(model_name)
+    default_rpm, default_tpm = MODEL_RATE_LIMITS.get(model_name, DEFAULT_RATE_LIMIT)
+    limiter = get_rate_limiter(model_name)
+    limiter.configure(requests_per_minute or default_rpm, tokens_per_minute or default_tpm)
+    return limiter
@@ -0,0 +1,222 @@
+import os
+import csv
+import time
+import shutil
+import tempfile
+import threading
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+from ffmpeg_merge import (build_ffmpeg_command, run_ffmpeg, probe_duration, probe_source_streams,
+                          audio_passthrough_codec, DEFAULT_AUDIO_CODEC)
+from process_utils import make_log
+
+# ========== Segmented Burn-in ==========
+# Cores one x264/x265 encode keeps busy on its own; the automatic segment count fills the rest
+CORES_PER_SEGMENT = 4
+MAX_AUTO_SEGMENTS = 16
+# Shorter segments cost more in split/concat overhead than they win in parallelism
+MIN_SEGMENT_SECONDS = 60
+
+
+def auto_segment_count(duration, cpu_count=None):
+    """Segments worth running in parallel for a video of `duration` seconds on this machine"""
+    cpu_count = cpu_count or os.cpu_count() or 1
+    segments = max(1, min(MAX_AUTO_SEGMENTS, cpu_count // CORES_PER_SEGMENT))
+    if duration:
+        segments = min(segments, max(1, int(duration // MIN_SEGMENT_SECONDS)))
+    return segments
+
+
+def _run_copy_step(cmd, log_callback=None, stop_callback=None, process_callback=None):
+    """Run a stream-copy FFmpeg step (split or join); only errors are logged. Returns the exit code, None if stopped"""
+    cmd = cmd[:1] + ["-v", "error"] + cmd[1:]
+    return run_ffmpeg(cmd, log_callback=log_callback, stop_callback=stop_callback, process_callback=process_callback, duration=0)
+
+
+def split_at_keyframes(video_path, work_dir, segments, duration, log_callback=None, stop_callback=None, process_callback=None):
+    """Split the video stream into about `segments` parts without re-encoding.
+
+    Cuts land on the first keyframe at or after each evenly spaced split time, so the
+    real boundaries are read back from the segment list. Returns [(path, start, end)].
+    """
+    split_times = [duration * i / segments for i in range(1, segments)]
+    list_path = os.path.join(work_dir, "segments.csv")
+    cmd = [
+        "ffmpeg", "-y", "-i", os.path.normpath(video_path),
+        "-map", "0:v:0", "-an", "-sn", "-c", "copy",
+        "-f", "segment", "-segment_times", ",".join(f"{t:.3f}" for t in split_times),
+        "-segment_list", list_path, "-segment_list_type", "csv", "-reset_timestamps", "1",
+        os.path.join(work_dir, "segment_%03d.mkv")
+    ]
+    returncode = _run_copy_step(cmd, log_callback, stop_callback, process_callback)
+    if returncode != 0:
+        return returncode, []
+    parts = []
+    with open(list_path, "r", encoding="utf-8", newline="") as f:
+        for name, start, end in csv.reader(f):
+            parts.append((os.path.join(work_dir, name), float(start), float(end)))
+    return 0, parts
+
+
+def write_shifted_srt(subtitles, start, end, path):
+    """Write the cues overlapping [start, end) moved so that `start` becomes 0"""
+    import srt
+
+    offset = timedelta(seconds=start)
+    limit = timedelta(seconds=end)
+    shifted = []
+    for sub in subtitles:
+        if sub.end <= offset or sub.start >= limit:
+            continue
+        shifted.append(srt.Subtitle(len(shifted) + 1, max(sub.start, offset) - offset,
+                                    min(sub.end, limit) - offset, sub.content))
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(srt.compose(shifted, reindex=False))
+
+
+class _CombinedProgress:
+    """Merges the progress of the parallel segment encodes into one snapshot for the whole video"""
+
+    def __init__(self, duration, progress_callback):
+        self.duration = duration
+        self.progress_callback = progress_callback
+        self.done = {}
+        self.fps = {}
+        self.start_time = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def update(self, index, progress):
+        if not self.progress_callback:
+            return
+        with self._lock:
+            if progress["out_seconds"] is not None:
+                self.done[index] = progress["out_seconds"]
+            self.fps[index] = 0.0 if progress["done"] else (progress["fps"] or 0.0)
+            encoded = sum(self.done.values())
+            elapsed = time.perf_counter() - self.start_time
+            speed = encoded / elapsed if elapsed else None
+            snapshot = {
+                "percent": min(100.0, encoded / self.duration * 100) if self.duration else None,
+                "out_seconds": encoded,
+                "fps": sum(self.fps.values()),
+                "speed": speed,
+                "eta_seconds": max(0.0, (self.duration - encoded) / speed) if speed and self.duration else None,
+                "frame": None,
+                "total_size": None,
+                "bitrate": None,
+                "done": False,
+            }
+        self.progress_callback(snapshot)
+
+
+def run_segmented_burn(video_path, srt_path, output_path, segments=0, log_callback=None, progress_callback=None,
+                       stop_callback=None, process_callback=None, stats=None, **options):
+    """Burn subtitles into a long video as parallel segment encodes, then join them losslessly.
+
+    The video stream is split at keyframes into `segments` parts (0 = auto_segment_count),
+    each part is burned with its own time-shifted SRT in a separate FFmpeg process, and
+    the parts are concatenated with the original audio. Subtitles other than .srt are
+    burned in one pass. `options` are the build_ffmpeg_command keywords. Returns the
+    exit code like run_ffmpeg (None if stopped).
+    """
+    import srt
+
+    log = make_log(log_callback)
+
+    start_time = time.perf_counter()
+    options = probe_source_streams(video_path, options)
+    duration = probe_duration(video_path)
+    if not duration:
+        raise RuntimeError(f"Could not read the duration of {video_path}")
+    segments = int(segments) or auto_segment_count(duration)
+    # Segment subtitles are time-shifted SRT; ASS/SSA styling would be lost, so those burn whole
+    srt_only = os.path.splitext(srt_path)[1].lower() == ".srt"
+    if segments <= 1 or not srt_only:
+        log("Video too short to split, burning it in one pass" if srt_only
+            else "Segmented burning only supports .srt subtitles, burning it in one pass")
+        return run_ffmpeg(build_ffmpeg_command(video_path, srt_path, output_path, **options), log_callback=log_callback,
+                          progress_callback=progress_callback, stop_callback=stop_callback,
+                          process_callback=process_callback, duration=duration, stats=stats)
+
+    with open(srt_path, "r", encoding="utf-8") as f:
+        subtitles = list(srt.parse(f.read()))
+
+    # Next to the output so the segment files stay on the same disk
+    work_dir = tempfile.mkdtemp(prefix=".segments_", dir=os.path.dirname(os.path.abspath(output_path)))
+    try:
+        log(f"Splitting {duration:.0f}s of video into {segments} segments at keyframes...")
+        returncode, parts = split_at_keyframes(video_path, work_dir, segments, duration,
+                                                 log_callback, stop_callback, process_callback)
+        if returncode != 0:
+            log(f"Splitting failed with return code {returncode}" if returncode is not None else "Stopped while splitting")
+            return returncode
+        log(f"Burning {len(parts)} segments in parallel")
+        # Share the cores between the parallel encoders instead of each sizing itself to the whole machine
+        if not options.get("threads"):
+            options["threads"] = max(1, (os.cpu_count() or 1) // len(parts))
+
+        combined = _CombinedProgress(duration, progress_callback)
+        results = {}
+
+        def burn(index, part):
+            part_path, part_start, part_end = part
+            part_srt = os.path.join(work_dir, f"segment_{index:03d}.srt")
+            write_shifted_srt(subtitles, part_start, part_end, part_srt)
+            part_output = os.path.join(work_dir, f"burned_{index:03d}.mkv")
+            # Segments carry no audio; it is added back from the source when joining
+            cmd = build_ffmpeg_command(part_path, part_srt, part_output, **options)
+            results[index] = run_ffmpeg(
+                cmd,
+                log_callback=lambda line: log(f"[segment {index + 1}] {line}"),
+                progress_callback=lambda progress: combined.update(index, progress),
+                stop_callback=stop_callback,
+                process_callback=process_callback,
+                duration=part_end - part_start
+            )
+            return part_output
+
+        with ThreadPoolExecutor(max_workers=len(parts)) as executor:
+            outputs = list(executor.map(burn, range(len(parts)), parts))
+
+        if any(code is None for code in results.values()):
+            log("Stopped during segment encoding")
+            return None
+        failed = [index + 1 for index, code in sorted(results.items()) if code != 0]
+        if failed:
+            log(f"Segments {', '.join(map(str, failed))} failed")
+            return results[failed[0] - 1]
+
+        audio_codec = options.get("audio_codec", DEFAULT_AUDIO_CODEC)
+        if options.get("audio_passthrough", True):
+            audio_codec = audio_passthrough_codec(audio_codec, options.get("source_audio_codec"))
+        concat_list = os.path.join(work_dir, "concat.txt")
+        with open(concat_list, "w", encoding="utf-8") as f:
+            for part_output in outputs:
+                f.write("file '{}'\n".format(part_output.replace("\\", "/").replace("'", "'\\''")))
+        cmd = [
+            "ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", concat_list,
+            "-i", os.path.normpath(video_path),
+            "-map", "0:v", "-map", "1:a?", "-c:v", "copy",
+            "-c:a", audio_codec,
+            os.path.normpath(output_path)
+        ]
+        log("Joining segments...")
+        returncode = _run_copy_step(cmd, log_callback, stop_callback, process_callback)
+        if returncode == 0 and stats is not None:
+            wall_seconds = time.perf_counter() - start_time
+            output_bytes = os.path.getsize(output_path)
+            stats.update({
+                "returncode": 0,
+                "wall_seconds": wall_seconds,
+                "duration": duration,
+                "segments": len(parts),
+                "frames": None,
+                "average_fps": None,
+                "speed": duration / wall_seconds if wall_seconds else None,
+                "output_bytes": output_bytes,
+                "bitrate_kbps": output_bytes * 8 / duration / 1000,
+            })
+        return returncode
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
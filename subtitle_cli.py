@@ -0,0 +1,251 @@
+# Headless entry point: python -m subtitle_cli {translate,extract,merge,pipeline} --help
+# Heavy dependencies (faster_whisper, google.generativeai, srt) are imported only by the
+# command that needs them, and Tk is never imported.
+import os
+import sys
+import argparse
+from pathlib import Path
+
+from ffmpeg_merge import (DEFAULT_SUBTITLE_STYLE, DEFAULT_VIDEO_CODEC, DEFAULT_AUDIO_CODEC, DEFAULT_VIDEO_QUALITY,
+                          ENCODER_SPEED_PRESETS, X264_TUNES)
+
+DEFAULT_GEMINI_MODEL = "gemini-2.5-flash"
+
+
+# ========== Shared Options ==========
+def add_translate_options(parser):
+    parser.add_argument("--target_lang", default="zh", help="Target language for translation (default: 'zh')")
+    parser.add_argument("--gemini_model", default=DEFAULT_GEMINI_MODEL, help=f"Gemini model (default: {DEFAULT_GEMINI_MODEL})")
+    parser.add_argument("--api_key", default=None, help="Gemini API key (default: $GEMINI_API_KEY or $GOOGLE_API_KEY)")
+    parser.add_argument("--proxy", default=None, help="HTTP(S) proxy URL, e.g. http://127.0.0.1:7890")
+    parser.add_argument("--concurrency", type=int, default=4, help="Number of batches translated at the same time (default: 4)")
+    parser.add_argument("--rpm", type=int, default=None, help="Requests per minute allowed for the model (default: model quota)")
+    parser.add_argument("--tpm", type=int, default=None, help="Tokens per minute allowed for the model (default: model quota)")
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or write the translation cache")
+    parser.add_argument("--batch-tokens", type=int, default=None, help="Source tokens packed into one request (default: per-model budget)")
+    parser.add_argument("--full", action="store_true", help="Retranslate every cue instead of only the ones changed since the last run")
+
+
+def add_extract_options(parser):
+    parser.add_argument("--model", required=True, help="Path to the local Whisper model directory")
+    parser.add_argument("--device", default="cpu", help="cpu, cuda or auto (default: cpu)")
+    parser.add_argument("--profile", default=None, choices=["fastest", "balanced", "accurate"], help="Performance profile (default: accurate)")
+    parser.add_argument("--compute_type", default=None, help="CTranslate2 compute type, e.g. int8 (default: from the profile)")
+    parser.add_argument("--parallel_workers", type=int, default=1, help="Worker processes transcribing chunks of one file (default: 1)")
+    parser.add_argument("--no-audio-cache", action="store_true", help="Decode the video directly instead of caching its 16 kHz audio track")
+    parser.add_argument("--low-memory", action="store_true", help="Feed the cached audio track window by window so memory does not grow with its length")
+
+
+def add_merge_options(parser):
+    style = parser.add_argument_group("subtitle style")
+    style.add_argument("--font_name", default=DEFAULT_SUBTITLE_STYLE["font_name"])
+    style.add_argument("--font_size", default=DEFAULT_SUBTITLE_STYLE["font_size"])
+    style.add_argument("--font_color", default=DEFAULT_SUBTITLE_STYLE["font_color"], help="RRGGBB hex")
+    style.add_argument("--outline_color", default=DEFAULT_SUBTITLE_STYLE["outline_color"], help="RRGGBB hex")
+    style.add_argument("--outline_width", default=DEFAULT_SUBTITLE_STYLE["outline_width"])
+    style.add_argument("--bold", action="store_true")
+    style.add_argument("--italic", action="store_true")
+    style.add_argument("--position", default=DEFAULT_SUBTITLE_STYLE["position"], choices=["bottom", "top", "center"])
+    style.add_argument("--margin_vertical", default=DEFAULT_SUBTITLE_STYLE["margin_vertical"])
+    style.add_argument("--margin_horizontal", default=DEFAULT_SUBTITLE_STYLE["margin_horizontal"])
+    encode = parser.add_argument_group("encoding")
+    encode.add_argument("--mode", default="burn", choices=["burn", "mux"],
+                        help="burn: re-encode with subtitles drawn in; mux: add a soft subtitle track without re-encoding (default: burn)")
+    encode.add_argument("--segments", type=int, default=1,
+                        help="Burn in this many keyframe-aligned segments in parallel (0 = auto by CPU count, default: 1)")
+    encode.add_argument("--video_codec", default=DEFAULT_VIDEO_CODEC)
+    encode.add_argument("--audio_codec", default=DEFAULT_AUDIO_CODEC)
+    encode.add_argument("--crf", default=DEFAULT_VIDEO_QUALITY, help=f"Quality for libx264/libx265 (default: {DEFAULT_VIDEO_QUALITY})")
+    encode.add_argument("--speed", default=None, choices=list(ENCODER_SPEED_PRESETS),
+                        help="Encoder speed/quality preset (default: the encoder's own default)")
+    encode.add_argument("--tune", default=None, choices=X264_TUNES, help="x264/x265 tune, e.g. film or animation")
+    encode.add_argument("--threads", type=int, default=None, help="Encoder threads (default: FFmpeg's choice)")
+    encode.add_argument("--no-audio-passthrough", action="store_true",
+                        help="Re-encode the audio even when it is already in the target codec")
+
+
+# ========== Commands ==========
+def setup_gemini(args):
+    """Apply proxy, API key, model and rate limit from the parsed arguments"""
+    from gemini_srt_translate import configure_gemini
+    from rate_limiter import configure_rate_limit
+
+    api_key = args.api_key or os.environ.get("GEMINI_API_KEY") or os.environ.get("GOOGLE_API_KEY")
+    if not api_key:
+        raise SystemExit("error: a Gemini API key is required (--api_key or $GEMINI_API_KEY)")
+    if args.proxy:
+        os.environ["HTTP_PROXY"] = args.proxy
+        os.environ["HTTPS_PROXY"] = args.proxy
+    configure_gemini(api_key, args.gemini_model)
+    configure_rate_limit(args.gemini_model, args.rpm, args.tpm)
+
+
+def merge_options(args):
+    """Keyword arguments for build_ffmpeg_command from the parsed arguments"""
+    options = {key: getattr(args, key) for key in DEFAULT_SUBTITLE_STYLE}
+    options.update(video_codec=args.video_codec, audio_codec=args.audio_codec, video_quality=args.crf, mode=args.mode,
+                   speed_preset=args.speed, tune=args.tune, threads=args.threads,
+                   audio_passthrough=not args.no_audio_passthrough)
+    return options
+
+
+def print_progress(progress):
+    from ffmpeg_merge import format_progress
+    print(f"{format_progress(progress):<70}", end="\r", flush=True)
+
+
+def run_translate(args, input_file, output_file):
+    from gemini_srt_translate import translate_srt
+
+    setup_gemini(args)
+    translate_srt(input_file, output_file, args.target_lang, concurrency=args.concurrency,
+                  use_cache=not args.no_cache, token_budget=args.batch_tokens, incremental=not args.full,
+                  resume=args.resume)
+    return output_file
+
+
+def run_extract(args, video_path, output_path):
+    from faster_whisper_extract_srt import extract_subtitles_with_whisper
+
+    return extract_subtitles_with_whisper(
+        video_path,
+        output_path=output_path,
+        local_model_path=args.model,
+        device=args.device,
+        compute_type=args.compute_type,
+        profile=args.profile,
+        parallel_workers=args.parallel_workers,
+        resume=args.resume,
+        audio_cache=not args.no_audio_cache,
+        low_memory=args.low_memory
+    )
+
+
+def run_merge(args, video_path, srt_path, output_path):
+    from ffmpeg_merge import (build_ffmpeg_command, ffmpeg_available, run_ffmpeg, format_merge_stats,
+                              record_merge_stats, encoder_summary, probe_source_streams)
+
+    if not ffmpeg_available():
+        raise SystemExit("error: FFmpeg not found. Please install FFmpeg and add it to your PATH.")
+    options = probe_source_streams(video_path, merge_options(args))
+    cmd = build_ffmpeg_command(video_path, srt_path, output_path, **options)
+    print(f"Command: {' '.join(cmd)}")
+    print(f"Encoder flags: {encoder_summary(cmd)}")
+    stats = {}
+    if args.segments != 1 and args.mode == "burn":
+        from segmented_merge import run_segmented_burn
+        returncode = run_segmented_burn(video_path, srt_path, output_path, segments=args.segments, log_callback=print,
+                                        progress_callback=print_progress, stats=stats, **options)
+    else:
+        returncode = run_ffmpeg(cmd, log_callback=print, progress_callback=print_progress, stats=stats)
+    print()
+    record_merge_stats(cmd, stats)
+    if returncode != 0:
+        raise SystemExit(f"error: FFmpeg failed with return code {returncode}")
+    print(f"Encode stats: {format_merge_stats(stats)}")
+    return output_path
+
+
+def cmd_translate(args):
+    output = args.output or str(Path(args.input).with_name(f"{Path(args.input).stem}_translated.srt"))
+    run_translate(args, args.input, output)
+
+
+def cmd_extract(args):
+    if os.path.isfile(args.input):
+        output = args.output or str(Path(args.input).with_suffix(".srt"))
+        run_extract(args, args.input, output)
+        return
+
+    # A folder or glob pattern runs as a batch with a resumable job queue
+    from batch_extract import run_batch
+    summary = run_batch(args.input, args.model, device=args.device, compute_type=args.compute_type,
+                        profile=args.profile, concurrent_files=args.jobs, output_dir=args.output,
+                        parallel_workers=args.parallel_workers, audio_cache=not args.no_audio_cache,
+                        low_memory=args.low_memory)
+    if summary["failed"]:
+        raise SystemExit(1)
+
+
+def cmd_merge(args):
+    video = Path(args.video)
+    output = args.output or str(video.with_name(f"{video.stem}_with_subtitles.mp4"))
+    run_merge(args, args.video, args.srt, output)
+
+
+def cmd_pipeline(args):
+    from subtitle_pipeline import run_pipeline
+    from gemini_srt_translate import open_translation_cache
+
+    setup_gemini(args)
+    cache = None if args.no_cache else open_translation_cache()
+    try:
+        result = run_pipeline(
+            args.video, args.model, args.target_lang,
+            output_path=args.output,
+            work_dir=args.work_dir,
+            extract_options={"device": args.device, "compute_type": args.compute_type,
+                             "profile": args.profile, "parallel_workers": args.parallel_workers,
+                             "audio_cache": not args.no_audio_cache, "low_memory": args.low_memory},
+            concurrency=args.concurrency,
+            token_budget=args.batch_tokens,
+            cache=cache,
+            merge_options=merge_options(args),
+            incremental=not args.full,
+            segments=args.segments,
+            ffmpeg_progress_callback=print_progress
+        )
+    finally:
+        if cache is not None:
+            cache.close()
+    if result["output"] is None:
+        raise SystemExit(1)
+    print(f"Pipeline output: {result['output']}")
+
+
+# ========== Command Line Interface ==========
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m subtitle_cli",
+                                     description="Extract, translate and burn in subtitles without the GUI")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    translate = commands.add_parser("translate", help="Translate an SRT file with Gemini")
+    translate.add_argument("input", help="Input SRT file")
+    translate.add_argument("-o", "--output", default=None, help="Output SRT file (default: <input>_translated.srt)")
+    translate.add_argument("--resume", action="store_true", help="Continue an interrupted run from its checkpoint journal")
+    add_translate_options(translate)
+    translate.set_defaults(func=cmd_translate)
+
+    extract = commands.add_parser("extract", help="Extract subtitles from a video, folder or glob with Faster Whisper")
+    extract.add_argument("input", help="Video file, folder or glob pattern")
+    extract.add_argument("-o", "--output", default=None, help="Output SRT file, or output folder for a batch (default: next to each video)")
+    extract.add_argument("--jobs", type=int, default=1, help="Files transcribed at the same time in a batch (default: 1)")
+    extract.add_argument("--resume", action="store_true", help="Continue an interrupted extraction from its checkpoint (always on for batches)")
+    add_extract_options(extract)
+    extract.set_defaults(func=cmd_extract)
+
+    merge = commands.add_parser("merge", help="Burn an SRT file into a video with FFmpeg")
+    merge.add_argument("video", help="Input video file")
+    merge.add_argument("srt", help="Subtitle file to burn in")
+    merge.add_argument("-o", "--output", default=None, help="Output video (default: <video>_with_subtitles.mp4)")
+    add_merge_options(merge)
+    merge.set_defaults(func=cmd_merge)
+
+    pipeline = commands.add_parser("pipeline", help="Extract, translate and burn in subtitles for one video, translating while transcribing")
+    pipeline.add_argument("video", help="Input video file")
+    pipeline.add_argument("-o", "--output", default=None, help="Output video (default: <video>_with_subtitles.mp4)")
+    pipeline.add_argument("--work_dir", default=None, help="Folder for the intermediate SRT files (default: next to the video)")
+    add_extract_options(pipeline)
+    add_translate_options(pipeline)
+    add_merge_options(pipeline)
+    pipeline.set_defaults(func=cmd_pipeline)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
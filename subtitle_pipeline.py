@@ -0,0 +1,157 @@
+import os
+import time
+import threading
+from datetime import timedelta
+from pathlib import Path
+
+from ffmpeg_merge import build_ffmpeg_command, ffmpeg_available, run_ffmpeg, format_merge_stats, record_merge_stats, encoder_summary, probe_source_streams
+from process_utils import make_log
+
+
+def pipeline_paths(video_path, output_path=None, work_dir=None):
+    """Return (source_srt, translated_srt, output_video) for a pipeline run"""
+    video = Path(video_path)
+    work_dir = Path(work_dir) if work_dir else video.parent
+    source_srt = str(work_dir / f"{video.stem}.srt")
+    translated_srt = str(work_dir / f"{video.stem}_translated.srt")
+    output_path = output_path or str(video.with_name(f"{video.stem}_with_subtitles.mp4"))
+    return source_srt, translated_srt, output_path
+
+
+def run_pipeline(video_path, local_model_path, target_lang, output_path=None, work_dir=None,
+                 extract_options=None, concurrency=4, token_budget=None, cache=None, merge_options=None,
+                 incremental=True, segments=1,
+                 log_callback=None, ffmpeg_log_callback=None, ffmpeg_progress_callback=None, progress_callback=None,
+                 stop_callback=None, process_callback=None):
+    """Video -> Whisper SRT -> translated SRT -> video with burned-in subtitles.
+
+    Whisper segments are handed to the translator as they are produced, so early cues
+    are translated while later audio is still being transcribed; FFmpeg starts as soon
+    as the translated SRT is written. Returns a dict with the output paths and the
+    per-stage timings. Returns None for the output video if the run was stopped.
+    progress_callback(done_cues, total_cues) follows the translation; FFmpeg progress
+    snapshots (see ffmpeg_merge.FFmpegProgress) go to ffmpeg_progress_callback.
+    Without `incremental`, translations recorded for an earlier output are not reused;
+    `segments` other than 1 burns in with segmented_merge.run_segmented_burn.
+    """
+    import srt
+    from faster_whisper_extract_srt import extract_subtitles_with_whisper
+    from gemini_srt_translate import StreamingTranslator, current_model_name, PROMPT_VERSION
+    from translation_manifest import load_previous_translations, save_manifest
+
+    log = make_log(log_callback)
+
+    source_srt, translated_srt, output_path = pipeline_paths(video_path, output_path, work_dir)
+    if not ffmpeg_available():
+        raise RuntimeError("FFmpeg not found. Please install FFmpeg and add it to your PATH.")
+
+    failed = threading.Event()
+
+    def should_stop():
+        return failed.is_set() or bool(stop_callback and stop_callback())
+
+    translator = StreamingTranslator(target_lang, concurrency=concurrency, token_budget=token_budget, cache=cache,
+                                     log_callback=log_callback, progress_callback=progress_callback,
+                                     stop_callback=should_stop,
+                                     previous=load_previous_translations(translated_srt, target_lang,
+                                                                         current_model_name(), PROMPT_VERSION)
+                                     if incremental else None)
+
+    def on_segment(index, start, end, text):
+        if text:
+            translator.add([srt.Subtitle(index, timedelta(seconds=start), timedelta(seconds=end), text)])
+
+    timings = {}
+    translate_done = {}
+
+    def translate_worker():
+        try:
+            translator.run()
+        except Exception as e:
+            # Re-raised on the calling thread once extraction has wound down
+            translate_done["error"] = e
+            failed.set()
+        finally:
+            translate_done["at"] = time.perf_counter()
+
+    pipeline_start = time.perf_counter()
+    translate_thread = threading.Thread(target=translate_worker, daemon=True)
+    translate_thread.start()
+
+    # ---- Stage 1+2: transcribe, with translation running alongside ----
+    extract_stats = {}
+    try:
+        extract_subtitles_with_whisper(
+            video_path,
+            output_path=source_srt,
+            local_model_path=local_model_path,
+            log_callback=log_callback,
+            stop_callback=should_stop,
+            stats=extract_stats,
+            segment_callback=on_segment,
+            **(extract_options or {})
+        )
+    except Exception:
+        failed.set()
+        raise
+    finally:
+        translator.finish()
+        extract_end = time.perf_counter()
+        timings["extract"] = extract_end - pipeline_start
+        translate_thread.join()
+
+    if "error" in translate_done:
+        log(f"❌ Translation failed, not burning in: {translate_done['error']}")
+        raise translate_done["error"]
+    timings["translate"] = translate_done["at"] - pipeline_start
+    # Time spent translating after the last cue was transcribed, i.e. what did not overlap
+    timings["translate_tail"] = max(0.0, translate_done["at"] - extract_end)
+    log(f"⏱ Extract {timings['extract']:.1f}s, translation finished {timings['translate_tail']:.1f}s after extraction "
+        f"({translator.stats['cues']} cues translated, {translator.stats['cache_hits']} from cache, "
+        f"{translator.stats['reused']} reused from the previous output)")
+
+    if should_stop() or extract_stats.get("stopped"):
+        log("Pipeline stopped before burn-in")
+        return {"source_srt": source_srt, "translated_srt": None, "output": None, "timings": timings}
+
+    with open(translated_srt, "w", encoding="utf-8") as f:
+        f.write(srt.compose(translator.subtitles))
+    save_manifest(translated_srt, translator.translated_pairs(), target_lang, translator.model_name, PROMPT_VERSION)
+    log(f"Translated subtitles saved to: {translated_srt}")
+    if translator.stats["failed"]:
+        # Usually an API key, quota or safety problem; the translated cues are kept for the next run
+        raise RuntimeError(f"{translator.stats['failed']} cues could not be translated, not burning in. "
+                           f"Fix the Gemini error in the log and run again; finished cues are reused.")
+
+    # ---- Stage 3: burn in ----
+    merge_start = time.perf_counter()
+    merge_stats = {}
+    merge_options = probe_source_streams(video_path, merge_options or {})
+    cmd = build_ffmpeg_command(video_path, translated_srt, output_path, **merge_options)
+    log(f"Command: {' '.join(cmd)}")
+    log(f"Encoder flags: {encoder_summary(cmd)}")
+    callbacks = dict(log_callback=ffmpeg_log_callback or log_callback, progress_callback=ffmpeg_progress_callback,
+                     stop_callback=stop_callback, process_callback=process_callback, stats=merge_stats)
+    if segments != 1 and merge_options.get("mode", "burn") == "burn":
+        from segmented_merge import run_segmented_burn
+        returncode = run_segmented_burn(video_path, translated_srt, output_path, segments=segments,
+                                        **callbacks, **merge_options)
+    else:
+        returncode = run_ffmpeg(cmd, **callbacks)
+    timings["merge"] = time.perf_counter() - merge_start
+    timings["total"] = time.perf_counter() - pipeline_start
+
+    if returncode is None:
+        log("Pipeline stopped during burn-in")
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        return {"source_srt": source_srt, "translated_srt": translated_srt, "output": None, "timings": timings}
+    record_merge_stats(cmd, merge_stats)
+    if returncode != 0:
+        raise RuntimeError(f"FFmpeg failed with return code {returncode}")
+    log(f"Encode stats: {format_merge_stats(merge_stats)}")
+
+    log(f"✅ Pipeline finished in {timings['total']:.1f}s: extract {timings['extract']:.1f}s, "
+        f"translate {timings['translate']:.1f}s (overlapped, {timings['translate_tail']:.1f}s after extraction), "
+        f"merge {timings['merge']:.1f}s")
+    return {"source_srt": source_srt, "translated_srt": translated_srt, "output": output_path, "timings": timings}
@@ -0,0 +1,104 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+# ========== Translation Memory ==========
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".srt_translator", "translation_cache.sqlite3")
+DEFAULT_MAX_ENTRIES = 200000
+
+
+def normalize_text(text):
+    """Normalize cue text so trivially different copies of a line share one cache entry"""
+    text = unicodedata.normalize("NFC", text)
+    lines = [re.sub(r"\s+", " ", line).strip() for line in text.strip().splitlines()]
+    return "\n".join(line for line in lines if line)
+
+
+class TranslationCache:
+    """On-disk cue translation cache keyed by normalized text, language, model and prompt version.
+
+    Entries are evicted least-recently-used once the cache grows past `max_entries`.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = str(path)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS translations ("
+            "key TEXT PRIMARY KEY, translation TEXT NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_used ON translations(last_used)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(text, target_lang, model_name, prompt_version):
+        raw = "\x1f".join([normalize_text(text), target_lang.strip().lower(), model_name, str(prompt_version)])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get_many(self, texts, target_lang, model_name, prompt_version):
+        """Return {text: translation} for the cached texts and count hits/misses"""
+        keys = {self.make_key(text, target_lang, model_name, prompt_version): text for text in texts}
+        found = {}
+        with self._lock:
+            key_list = list(keys)
+            # Stay well below SQLite's bound-parameter limit
+            for i in range(0, len(key_list), 500):
+                chunk = key_list[i:i+500]
+                rows = self._conn.execute(
+                    f"SELECT key, translation FROM translations WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall()
+                for key, translation in rows:
+                    found[keys[key]] = translation
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE translations SET last_used = ? WHERE key = ?",
+                    [(now, key) for key in keys if keys[key] in found]
+                )
+                self._conn.commit()
+        self.hits += sum(1 for text in texts if text in found)
+        self.misses += sum(1 for text in texts if text not in found)
+        return found
+
+    def put_many(self, pairs, target_lang, model_name, prompt_version):
+        """Store (source_text, translation) pairs and evict the oldest entries if over the limit"""
+        if not pairs:
+            return
+        now = time.time()
+        rows = [(self.make_key(text, target_lang, model_name, prompt_version), translation, now)
+                for text, translation in pairs]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO translations (key, translation, last_used) VALUES (?, ?, ?)",
+                rows
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM translations WHERE key IN "
+                "(SELECT key FROM translations ORDER BY last_used ASC LIMIT ?)",
+                (overflow,)
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,146 @@
+import os
+import json
+import time
+import hashlib
+import threading
+
+from translation_cache import normalize_text
+from process_utils import console_log
+
+# ========== Source Manifest ==========
+# Stored next to a translated SRT so the next run can tell which source cues changed
+MANIFEST_SUFFIX = ".source.json"
+MANIFEST_VERSION = 1
+
+
+def manifest_path(output_file):
+    return str(output_file) + MANIFEST_SUFFIX
+
+
+def cue_hash(text):
+    """Content hash of a source cue; timing and index changes do not affect it"""
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def load_previous_translations(output_file, target_lang, model_name, prompt_version):
+    """Return {cue_hash: translation} recorded with an earlier output, or {} if none matches.
+
+    A manifest written for another language, model or prompt version is ignored, as is
+    one whose output file has since been deleted.
+    """
+    path = manifest_path(output_file)
+    if not os.path.exists(path) or not os.path.exists(output_file):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    expected = {"version": MANIFEST_VERSION, "target_lang": target_lang.strip().lower(),
+                "model": model_name, "prompt_version": prompt_version}
+    if any(manifest.get(key) != value for key, value in expected.items()):
+        return {}
+    return {cue["hash"]: cue["translation"] for cue in manifest.get("cues", [])
+            if isinstance(cue, dict) and "hash" in cue and "translation" in cue}
+
+
+def save_manifest(output_file, pairs, target_lang, model_name, prompt_version):
+    """Record (source_text, translation) pairs for the cues that were translated into output_file"""
+    path = manifest_path(output_file)
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "target_lang": target_lang.strip().lower(),
+        "model": model_name,
+        "prompt_version": prompt_version,
+        "cues": [{"hash": cue_hash(source), "translation": translation} for source, translation in pairs],
+    }
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(temp_path, path)
+
+
+# ========== Checkpoint Journal ==========
+JOURNAL_SUFFIX = ".journal"
+
+
+def journal_path(output_file):
+    return str(output_file) + JOURNAL_SUFFIX
+
+
+class TranslationJournal:
+    """Append-only JSON-lines checkpoint of the cues translated so far for one output file.
+
+    The first line identifies the language, model and prompt version; every batch then
+    appends one line per translated cue and is fsynced, so an interrupted job loses at
+    most the batches still in flight. With `resume`, a matching journal is loaded into
+    `entries` ({cue_hash: translation}) and extended; otherwise an existing journal is
+    renamed aside (`set_aside`) rather than overwritten, and a new one is started.
+    """
+
+    def __init__(self, output_file, target_lang, model_name, prompt_version, resume=False, log_callback=None):
+        self.path = journal_path(output_file)
+        self.entries = {}
+        self._lock = threading.Lock()
+        header = {"version": MANIFEST_VERSION, "target_lang": target_lang.strip().lower(),
+                  "model": model_name, "prompt_version": prompt_version}
+        self.set_aside = None
+        if resume:
+            self.entries = self._load(header)
+        elif os.path.exists(self.path):
+            # An interrupted run's translations were paid for; keep them where --resume can be pointed back at them
+            self.set_aside = f"{self.path}.{time.strftime('%Y%m%d-%H%M%S')}"
+            os.replace(self.path, self.set_aside)
+            message = (f"Warning: an interrupted translation journal exists but resume is off; "
+                       f"moved it to {self.set_aside} (rename it back to {self.path} and resume to reuse it)")
+            console_log(message, log_callback)
+        # Rewritten rather than appended to, so a line torn by a crash does not hide later ones
+        self._file = open(self.path, "w", encoding="utf-8")
+        self._write([header] + [{"hash": key, "translation": value} for key, value in self.entries.items()])
+
+    def _load(self, header):
+        if not os.path.exists(self.path):
+            return {}
+        entries = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return {}
+        try:
+            if json.loads(lines[0]) != header:
+                return {}
+        except (IndexError, ValueError):
+            return {}
+        for line in lines[1:]:
+            try:
+                cue = json.loads(line)
+                entries[cue["hash"]] = cue["translation"]
+            except (ValueError, KeyError, TypeError):
+                # A line cut short by a crash; everything before it is intact
+                break
+        return entries
+
+    def _write(self, records):
+        self._file.write("".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def record(self, pairs):
+        """Checkpoint (source_text, translation) pairs from a finished batch"""
+        if not pairs:
+            return
+        with self._lock:
+            self._write([{"hash": cue_hash(source), "translation": translation} for source, translation in pairs])
+
+    def close(self):
+        """Close and keep the journal for a later resume"""
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+    def discard(self):
+        """Close and delete the journal once the output is complete"""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)